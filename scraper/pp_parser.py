@@ -1,12 +1,23 @@
 import os
 import re
+import html
+import mmap
+import gzip
 import pandas as pd
 import logging
-from bs4 import BeautifulSoup
-import glob
+import logging.handlers
+import multiprocessing
+from bs4 import BeautifulSoup, SoupStrainer, ParserRejectedMarkup
+import soupsieve as sv
 from datetime import datetime
 import argparse
+import csv
+import contextlib
 import json
+import orjson
+import shelve
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
 
 # set log
 logging.basicConfig(
@@ -19,61 +30,231 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# compiled once, these run for every parsed file
+_ASIN_RE = re.compile(r'([A-Z0-9]{10})_')
+_BRAND_PREFIX_RE = re.compile(r'^(Visit the|Brand:|by)\s+', re.I)
+_BRAND_SUFFIX_RE = re.compile(r'\s+Store$')
+_DT_RE = re.compile(r'_(\d{8})_(\d{6})\.html(?:\.gz)?$')
+_DT_ALT_RE = re.compile(r'_(\d{4}-\d{2}-\d{2})_(\d{2}-\d{2}-\d{2})\.html(?:\.gz)?$')
+_WS_RE = re.compile(r'\s+')
+_BEST_SELLERS_RE = re.compile("Best Sellers Rank")
+_BEST_SELLERS_BYTES = b"Best Sellers Rank"
+_SAFE_TERM_RE = re.compile(r'[^a-zA-Z0-9]')
+# quick mode, matched against the raw file bytes
+_TITLE_BYTES_RE = re.compile(rb'id="productTitle"[^>]*>\s*([^<]+)')
+_IMG_TAG_BYTES_RE = re.compile(rb'<img\b[^>]*\bid="landingImage"[^>]*>')
+_SRC_BYTES_RE = re.compile(rb'\bsrc="([^"]+)"')
+
+# output columns, in the order parse_product_html_file fills them
+PRODUCT_FIELDS = (
+    'asin',
+    'search_term',
+    'scrape_date',
+    'scrape_time',
+    'title',
+    'brand',
+    'categories',
+    'bullet_points',
+    'description',
+    'bestseller_rank',
+    'price_per_unit',
+    'product_details',
+    'image_url'
+)
+# one parsed product page, a plain tuple so rows are not hashed key by key
+ProductRecord = namedtuple('ProductRecord', PRODUCT_FIELDS)
+# low-cardinality columns stored as pandas categoricals
+CATEGORY_FIELDS = ('search_term', 'brand')
+# part of every parse cache key, bump when the parsed result changes shape
+CACHE_VERSION = 4
+# A+ content used as description is cut to this many characters
+APLUS_MAX_CHARS = 4096
+
+# page regions read by the _extract_* helpers, everything else is skipped at parse time
+PRODUCT_IDS = frozenset([
+    "productTitle",
+    "bylineInfo",
+    "brand",
+    "wayfinding-breadcrumbs_feature_div",
+    "wayfinding-breadcrumbs",
+    "searchDropdownBox",
+    "feature-bullets",
+    "featurebullets_feature_div",
+    "productDescription",
+    "aplus",
+    "dpx-aplus-product-description_feature_div",
+    "product-description-iframe",
+    "detailBulletsWrapper_feature_div",
+    "prodDetails",
+    "landingImage",
+    "imgTagWrapperId",
+    "altImages"
+])
+PRODUCT_CLASSES = frozenset(["a-normal", "pricePerUnit", "a-price-per-unit"])
+# containers that hold the "Best Sellers Rank" label, searched instead of the whole document
+BEST_SELLERS_CONTAINERS = ("detailBulletsWrapper_feature_div", "productDetails_detailBullets_sections1", "prodDetails")
+
+# classes collected by _index_nodes
+INDEXED_CLASSES = frozenset(["po-brand", "pricePerUnit", "a-price-per-unit", "a-normal"])
+
+
+class ProductStrainer(SoupStrainer):
+    """
+    SoupStrainer that only lets product-relevant subtrees into the soup.
+    Once a tag is accepted its whole subtree is kept.
+    """
+
+    def allow_tag_creation(self, nsprefix, name, attrs):
+        if name in ("title", "h1"):
+            return True
+        if not attrs:
+            return False
+        if name == "meta":
+            return attrs.get("name") == "brand"
+
+        tag_id = attrs.get("id")
+        if tag_id and (tag_id in PRODUCT_IDS or tag_id.startswith("productDetails") or "SalesRank" in tag_id):
+            return True
+
+        classes = attrs.get("class") or []
+        if isinstance(classes, str):
+            classes = classes.split()
+        for class_name in classes:
+            if class_name in PRODUCT_CLASSES or class_name.startswith("po-"):
+                return True
+
+        return attrs.get("data-testid") == "price-per-unit"
+
+
+PRODUCT_STRAINER = ProductStrainer()
+
+
+# parser of a worker process, built once by _init_worker
+_worker_parser = None
+
+
+def _init_worker(log_queue, html_dir, quick):
+    global _worker_parser
+    # worker records go through the queue, the parent process writes them to the log handlers
+    logging.getLogger().handlers[:] = [logging.handlers.QueueHandler(log_queue)]
+    # reused for every file the worker is given
+    _worker_parser = AmazonProductHTMLParser(html_dir, workers=1, quick=quick)
+
+
+def _parse_one(html_file, search_term):
+    # top-level so it can be pickled into worker processes
+    return _worker_parser.parse_product_html_file(html_file, search_term)
+
 
 class AmazonProductHTMLParser:
-    def __init__(self, html_dir):
+    # CSS selectors compiled once, run scoped to nodes found by _index_nodes
+    _BRAND_VALUE_SEL = sv.compile(".a-span9")
+    _BREADCRUMB_IDS = ("wayfinding-breadcrumbs_feature_div", "wayfinding-breadcrumbs")
+    _BREADCRUMB_SEL = sv.compile("#wayfinding-breadcrumbs_feature_div li, #wayfinding-breadcrumbs a")
+    _SELECTED_OPTION_SEL = sv.compile("option[selected]")
+    _VISIBLE_BULLET_SEL = sv.compile("li:not(.aok-hidden)")
+    _PRICE_SEL = sv.compile(".a-price")
+    _TABLE_LABEL_SEL = sv.compile("td:first-child span.a-text-bold")
+    _TABLE_VALUE_SEL = sv.compile("td.a-span9 span.po-break-word")
+    _ROW_LABEL_SEL = sv.compile("td:first-child span")
+    _ROW_VALUE_SEL = sv.compile("td:last-child span")
+
+    def __init__(self, html_dir, workers=None, cache_path=None, quick=False):
         self.html_dir = html_dir
         if not os.path.exists(html_dir):
             raise ValueError(f"Directory not found: {html_dir}")
+        # number of worker processes used to parse files, defaults to the CPU count
+        self.workers = workers or os.cpu_count() or 1
+        # optional shelve file keeping parsed results between runs
+        self.cache_path = cache_path
+        # only asin, date, title and image url, read from the raw HTML without building a tree
+        self.quick = quick
 
     def _extract_asin_from_filename(self, filename):
-        asin_match = re.match(r'([A-Z0-9]{10})_', filename)
+        asin_match = _ASIN_RE.match(filename)
         if asin_match:
             return asin_match.group(1)
         return None
 
-    def _extract_title(self, soup):
+    def _index_nodes(self, soup):
+        # single walk over the tree collecting every node the extractors need,
+        # instead of one full-tree select per selector
+        nodes = {
+            'ids': {},
+            'classes': {},
+            'h1': [],
+            'sales_rank_rows': [],
+            'po_rows': [],
+            'meta_brand': None,
+            'price_per_unit': None
+        }
+        
+        for tag in soup.find_all(True):
+            tag_id = tag.get('id')
+            if tag_id:
+                # first occurrence wins, dict order follows the document
+                nodes['ids'].setdefault(tag_id, tag)
+                if tag.name == 'tr' and 'SalesRank' in tag_id:
+                    nodes['sales_rank_rows'].append(tag)
+            
+            classes = tag.get('class')
+            if classes:
+                for class_name in classes:
+                    if class_name in INDEXED_CLASSES:
+                        nodes['classes'].setdefault(class_name, []).append(tag)
+                if tag.name == 'tr' and 'po-' in ' '.join(classes):
+                    nodes['po_rows'].append(tag)
+            
+            if tag.name == 'h1':
+                nodes['h1'].append(tag)
+            elif tag.name == 'meta' and nodes['meta_brand'] is None and tag.get('name') == 'brand':
+                nodes['meta_brand'] = tag
+            
+            if nodes['price_per_unit'] is None and tag.get('data-testid') == 'price-per-unit':
+                nodes['price_per_unit'] = tag
+        
+        return nodes
+
+    def _extract_title(self, nodes):
         try:
             # different selectors for title
-            title_selectors = [
-                "#productTitle",
-                "h1.a-size-large",
-                "h1.product-title"
-            ]
-            
-            for selector in title_selectors:
-                element = soup.select_one(selector)
-                if element:
-                    return element.get_text().strip()
+            element = nodes['ids'].get("productTitle")
+            if element:
+                return element.get_text(' ', strip=True)
+            
+            for title_class in ("a-size-large", "product-title"):
+                for element in nodes['h1']:
+                    if title_class in element.get('class', []):
+                        return element.get_text(' ', strip=True)
                     
             return None
         except Exception as e:
             logger.warning(f"Error extracting title: {e}")
             return None
 
-    def _extract_brand(self, soup):
+    def _extract_brand(self, nodes):
         try:
-            # multiple selectors for brand
-            brand_selectors = [
-                "#bylineInfo",
-                ".po-brand .a-span9",
-                "#brand",
-                "a#brand"
-            ]
-            
-            for selector in brand_selectors:
-                element = soup.select_one(selector)
-                if element:
-                    brand_text = element.get_text().strip()
-                    
-                    #cleAN common prefixes
-                    brand_text = re.sub(r'^(Visit the|Brand:|by)\s+', '', brand_text, flags=re.I)
-                    brand_text = re.sub(r'\s+Store$', '', brand_text)
-                    
-                    return brand_text.strip()
+            # multiple places for brand: #bylineInfo, .po-brand .a-span9, #brand
+            element = nodes['ids'].get("bylineInfo")
+            if not element:
+                for po_brand in nodes['classes'].get("po-brand", []):
+                    element = self._BRAND_VALUE_SEL.select_one(po_brand)
+                    if element:
+                        break
+            if not element:
+                element = nodes['ids'].get("brand")
+            
+            if element:
+                brand_text = element.get_text(' ', strip=True)
+                
+                #cleAN common prefixes
+                brand_text = _BRAND_PREFIX_RE.sub('', brand_text)
+                brand_text = _BRAND_SUFFIX_RE.sub('', brand_text)
+                
+                return brand_text.strip()
             
             # Try from meta tags
-            meta_brand = soup.find("meta", attrs={"name": "brand"})
+            meta_brand = nodes['meta_brand']
             if meta_brand:
                 return meta_brand.get("content", "").strip()
                 
@@ -82,42 +263,52 @@ class AmazonProductHTMLParser:
             logger.warning(f"Error extracting brand: {e}")
             return None
 
-    def _extract_categories(self, soup):
+    def _extract_categories(self, nodes):
         try:
             categories = []
             
-            # breadcrumb navigation
-            breadcrumbs = soup.select("#wayfinding-breadcrumbs_feature_div li, #wayfinding-breadcrumbs a")
-            for crumb in breadcrumbs:
-                text = crumb.get_text().strip()
+            # breadcrumb navigation, both containers in document order and an inner one only through its outer one,
+            # so the crumbs come out in the order of the page like a single select over the whole tree
+            containers = [nodes['ids'].get(tag_id) for tag_id in self._BREADCRUMB_IDS]
+            containers = [container for container in containers if container]
+            if len(containers) == 2:
+                # nodes['ids'] follows the document, an ancestor always comes before its descendants
+                first_id = next(tag_id for tag_id in nodes['ids'] if tag_id in self._BREADCRUMB_IDS)
+                if first_id != self._BREADCRUMB_IDS[0]:
+                    containers.reverse()
+                if any(parent is containers[0] for parent in containers[1].parents):
+                    containers.pop()
+            for crumb in (crumb for container in containers for crumb in self._BREADCRUMB_SEL.select(container)):
+                text = crumb.get_text(' ', strip=True)
                 if text and text not in ["›", "‹", "/"]:
                     categories.append(text)
             
             # dropdown categories
-            dropdown_cats = soup.select("#searchDropdownBox option[selected]")
-            if dropdown_cats:
-                categories.append(dropdown_cats[0].get_text().strip())
+            dropdown = nodes['ids'].get("searchDropdownBox")
+            selected = self._SELECTED_OPTION_SEL.select_one(dropdown) if dropdown else None
+            if selected:
+                categories.append(selected.get_text(' ', strip=True))
             
             return categories if categories else None
         except Exception as e:
             logger.warning(f"Error extracting categories: {e}")
             return None
 
-    def _extract_bullet_points(self, soup):
+    def _extract_bullet_points(self, nodes):
         try:
             bullet_points = []
             
             # Try feature bullets section
-            feature_bullets = soup.select("#feature-bullets li:not(.aok-hidden)")
-            for bullet in feature_bullets:
-                text = bullet.get_text().strip()
+            feature_bullets = nodes['ids'].get("feature-bullets")
+            for bullet in self._VISIBLE_BULLET_SEL.select(feature_bullets) if feature_bullets else []:
+                text = bullet.get_text(' ', strip=True)
                 if text:
                     bullet_points.append(text)
             
             # Try from feature div
-            feature_div = soup.select("#featurebullets_feature_div li")
-            for bullet in feature_div:
-                text = bullet.get_text().strip()
+            feature_div = nodes['ids'].get("featurebullets_feature_div")
+            for bullet in feature_div.find_all("li") if feature_div else []:
+                text = bullet.get_text(' ', strip=True)
                 if text:
                     bullet_points.append(text)
             
@@ -126,20 +317,29 @@ class AmazonProductHTMLParser:
             logger.warning(f"Error extracting bullet points: {e}")
             return None
 
-    def _extract_description(self, soup):
+    def _extract_description(self, nodes):
         try:
             # product description section
-            description_div = soup.select_one("#productDescription")
+            description_div = nodes['ids'].get("productDescription")
             if description_div:
-                return description_div.get_text().strip()
+                return description_div.get_text(' ', strip=True)
             
             # from overview section
-            overview = soup.select_one("#aplus, #dpx-aplus-product-description_feature_div")
+            overview = next((tag for tag_id, tag in nodes['ids'].items()
+                             if tag_id in ("aplus", "dpx-aplus-product-description_feature_div")), None)
             if overview:
-                return overview.get_text().strip()
+                # A+ sections can be huge, stop collecting text once the cap is reached
+                parts = []
+                length = 0
+                for text in overview.stripped_strings:
+                    parts.append(text)
+                    length += len(text) + 1
+                    if length > APLUS_MAX_CHARS:
+                        break
+                return ' '.join(parts)[:APLUS_MAX_CHARS]
             
             # iframed description
-            iframe = soup.select_one("#product-description-iframe")
+            iframe = nodes['ids'].get("product-description-iframe")
             if iframe:
                 return f"[Description in iframe: {iframe.get('src', '')}]"
             
@@ -148,31 +348,30 @@ class AmazonProductHTMLParser:
             logger.warning(f"Error extracting description: {e}")
             return None
 
-    def _extract_bestseller_rank(self, soup):
+    def _extract_bestseller_rank(self, nodes, has_rank_label=True):
         try:
             # product detail section
-            rank_rows = soup.find_all("tr", id=lambda x: x and "SalesRank" in x)
+            rank_rows = nodes['sales_rank_rows']
             if rank_rows:
-                return rank_rows[0].get_text().strip()
-            
-            # Tproduct information section
-            rank_section = soup.find(string=re.compile("Best Sellers Rank"))
-            if rank_section:
-                parent = rank_section.parent
-                rank_text = ""
-                current = parent
-                for _ in range(5): 
-                    if current:
-                        next_el = current.find_next_sibling()
-                        if next_el:
-                            rank_text += next_el.get_text().strip() + " "
-                            current = next_el
-                return rank_text.strip()
+                return rank_rows[0].get_text(' ', strip=True)
+            
+            # both fallbacks need the label, skip them when the raw page does not contain it
+            if not has_rank_label:
+                return None
+            
+            # Tproduct information section, only the strings of the known containers are searched
+            for container_id in BEST_SELLERS_CONTAINERS:
+                container = nodes['ids'].get(container_id)
+                rank_section = container.find(string=_BEST_SELLERS_RE) if container else None
+                if rank_section:
+                    # up to five following sibling tags in one call
+                    siblings = rank_section.parent.find_next_siblings(limit=5)
+                    return ' '.join(sibling.get_text(' ', strip=True) for sibling in siblings).strip()
             
             # details list
-            details_list = soup.select("#detailBulletsWrapper_feature_div li")
-            for item in details_list:
-                text = item.get_text().strip()
+            details_div = nodes['ids'].get("detailBulletsWrapper_feature_div")
+            for item in details_div.find_all("li") if details_div else []:
+                text = item.get_text(' ', strip=True)
                 if "Best Sellers Rank" in text:
                     return text
             
@@ -183,7 +382,7 @@ class AmazonProductHTMLParser:
         
     def _extract_datetime_from_filename(self, filename):
         # match the pattern ASIN_YYYYMMDD_HHMMSS.html
-        datetime_match = re.search(r'_(\d{8})_(\d{6})\.html$', filename)
+        datetime_match = _DT_RE.search(filename)
         
         if datetime_match:
             date_str = datetime_match.group(1)  # YYYYMMDD
@@ -199,7 +398,7 @@ class AmazonProductHTMLParser:
                 pass
         
         # pattern for different date formats
-        alt_match = re.search(r'_(\d{4}-\d{2}-\d{2})_(\d{2}-\d{2}-\d{2})\.html$', filename)
+        alt_match = _DT_ALT_RE.search(filename)
         if alt_match:
             date_str = alt_match.group(1)  # YYYY-MM-DD
             time_str = alt_match.group(2).replace('-', ':')  # HH-MM-SS -> HH:MM:SS
@@ -211,62 +410,64 @@ class AmazonProductHTMLParser:
             
         return {'scrape_date': None, 'scrape_time': None}
 
-    def _extract_price_per_unit(self, soup):
+    def _extract_price_per_unit(self, nodes):
         try:
+            price_containers = nodes['classes'].get("pricePerUnit", [])
+            
             # canonical price-per-unit container
-            price_per_unit = soup.select_one("span.pricePerUnit")
+            price_per_unit = next((tag for tag in price_containers if tag.name == "span"), None)
             if price_per_unit:
-                text = price_per_unit.get_text(separator=" ").strip()
+                text = price_per_unit.get_text(' ', strip=True)
                 text = text.replace('(', '').replace(')', '')
-                text = re.sub(r"\s+", " ", text)
+                text = _WS_RE.sub(" ", text)
                 return text if text else None
 
-            # Alternative selector patterns
-            alternative_selectors = [
-                ".a-price-per-unit",
-                ".pricePerUnit .a-price",
-                "[data-testid='price-per-unit']"
-            ]
-            for selector in alternative_selectors:
-                element = soup.select_one(selector)
-                if element:
-                    text = element.get_text(separator=" ").strip()
-                    text = re.sub(r"\s+", " ", text)
-                    return text if text else None
+            # Alternative patterns: .a-price-per-unit, .pricePerUnit .a-price, [data-testid='price-per-unit']
+            element = next(iter(nodes['classes'].get("a-price-per-unit", [])), None)
+            if not element:
+                element = next(filter(None, (self._PRICE_SEL.select_one(tag) for tag in price_containers)), None)
+            if not element:
+                element = nodes['price_per_unit']
+            if element:
+                text = element.get_text(' ', strip=True)
+                text = _WS_RE.sub(" ", text)
+                return text if text else None
 
             return None
         except Exception as e:
             logger.warning(f"Error extracting price per unit: {e}")
             return None
         
-    def _extract_product_details_table(self, soup):
+    def _extract_product_details_table(self, nodes):
         try:
             product_details = {}
             
             # Look for the product details table
-            table = soup.select_one("table.a-normal.a-spacing-micro")
-            if table:
-                rows = table.select("tr")
-                for row in rows:
-                    # Get the label (first column)
-                    label_cell = row.select_one("td:first-child span.a-text-bold")
-                    # Get the value (second column)
-                    value_cell = row.select_one("td.a-span9 span.po-break-word")
-                    
-                    if label_cell and value_cell:
-                        label = label_cell.get_text().strip()
-                        value = value_cell.get_text().strip()
-                        product_details[label.lower().replace(' ', '_')] = value
-            
-            # Alternative approach - look for specific class-based rows
-            detail_rows = soup.select("tr[class*='po-']")
-            for row in detail_rows:
-                label_cell = row.select_one("td:first-child span")
-                value_cell = row.select_one("td:last-child span")
+            table = next((tag for tag in nodes['classes'].get("a-normal", [])
+                          if tag.name == "table" and "a-spacing-micro" in tag.get('class', [])), None)
+            table_rows = table.find_all("tr") if table else []
+            
+            # one pass over the table rows plus the class-based po- rows outside it
+            table_row_ids = {id(row) for row in table_rows}
+            po_row_ids = {id(row) for row in nodes['po_rows']}
+            rows = table_rows + [row for row in nodes['po_rows'] if id(row) not in table_row_ids]
+            
+            for row in rows:
+                label_cell = value_cell = None
+                
+                # po- rows: first and last cell
+                if id(row) in po_row_ids:
+                    label_cell = self._ROW_LABEL_SEL.select_one(row)
+                    value_cell = self._ROW_VALUE_SEL.select_one(row)
+                
+                # table rows: bold label (first column) and value (second column)
+                if not (label_cell and value_cell) and id(row) in table_row_ids:
+                    label_cell = self._TABLE_LABEL_SEL.select_one(row)
+                    value_cell = self._TABLE_VALUE_SEL.select_one(row)
                 
                 if label_cell and value_cell:
-                    label = label_cell.get_text().strip()
-                    value = value_cell.get_text().strip()
+                    label = label_cell.get_text(' ', strip=True)
+                    value = value_cell.get_text(' ', strip=True)
                     product_details[label.lower().replace(' ', '_')] = value
             
             return product_details if product_details else None
@@ -274,23 +475,37 @@ class AmazonProductHTMLParser:
             logger.warning(f"Error extracting product details table: {e}")
             return None
         
-    def _extract_image_url(self, soup):
+    def _extract_quick_fields(self, html_content):
+        # (title, image_url) straight from the bytes, None when either is missing so the page gets parsed
+        title_match = _TITLE_BYTES_RE.search(html_content)
+        img_match = _IMG_TAG_BYTES_RE.search(html_content)
+        src_match = _SRC_BYTES_RE.search(img_match.group(0)) if img_match else None
+        if not title_match or not src_match:
+            return None
+        
+        title = html.unescape(title_match.group(1).decode('utf-8', 'replace')).strip()
+        image_url = html.unescape(src_match.group(1).decode('utf-8', 'replace'))
+        return title, image_url
+
+    def _extract_image_url(self, nodes):
         """
         Extract main product image URL from Amazon product page.
         """
         try:
             # Primary landing image
-            img = soup.select_one("#landingImage")
+            img = nodes['ids'].get("landingImage")
             if img and img.get("src"):
                 return img["src"]
 
             # Wrapper fallback
-            img = soup.select_one("#imgTagWrapperId img")
+            wrapper = nodes['ids'].get("imgTagWrapperId")
+            img = wrapper.find("img") if wrapper else None
             if img and img.get("src"):
                 return img["src"]
 
             # Thumbnail images (first one as fallback)
-            thumbnails = soup.select("#altImages img")
+            alt_images = nodes['ids'].get("altImages")
+            thumbnails = alt_images.find_all("img") if alt_images else []
             for thumb in thumbnails:
                 src = thumb.get("src")
                 if src:
@@ -301,6 +516,14 @@ class AmazonProductHTMLParser:
             logger.warning(f"Error extracting image URL: {e}")
             return None
 
+    def _make_soup(self, html_content, html_file, parse_only=PRODUCT_STRAINER):
+        try:
+            return BeautifulSoup(html_content, 'lxml', parse_only=parse_only)
+        except ParserRejectedMarkup as e:
+            # slower, but html.parser copes with some markup lxml rejects
+            logger.warning(f"lxml could not parse {html_file}, retrying with html.parser: {e}")
+            return BeautifulSoup(html_content, 'html.parser', parse_only=parse_only)
+
     def parse_product_html_file(self, html_file, search_term=None):
         try:
             logger.info(f"Parsing file: {html_file}")
@@ -311,39 +534,65 @@ class AmazonProductHTMLParser:
             datetime_info = self._extract_datetime_from_filename(filename)
             
             # HTML file
-            with open(html_file, 'r', encoding='utf-8', errors='replace') as f:
-                html_content = f.read()
-            
-            # parse using BeautifulSoup
-            soup = BeautifulSoup(html_content, 'html.parser')
-            
-            # product details
-            title = self._extract_title(soup)
-            brand = self._extract_brand(soup)
-            categories = self._extract_categories(soup)
-            bullet_points = self._extract_bullet_points(soup)
-            description = self._extract_description(soup)
-            bestseller_rank = self._extract_bestseller_rank(soup)
-            price_per_unit = self._extract_price_per_unit(soup)
-            product_details = self._extract_product_details_table(soup)
-            image_url = self._extract_image_url(soup)
+            # raw bytes, the parser detects the declared charset itself
+            if html_file.endswith(".gz"):
+                # page saved compressed (scraper_pp.py --gzip)
+                with gzip.open(html_file, 'rb') as f:
+                    html_content = f.read()
+                quick_fields = self._extract_quick_fields(html_content) if self.quick else None
+            else:
+                with open(html_file, 'rb') as f:
+                    if self.quick and os.fstat(f.fileno()).st_size:
+                        # mapped, the regexes scan the page cache and the file is only copied when it has to be parsed
+                        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                            quick_fields = self._extract_quick_fields(mm)
+                            html_content = None if quick_fields else mm[:]
+                    else:
+                        quick_fields = None
+                        html_content = f.read()
+            
+            if quick_fields:
+                # the other fields are left empty in quick mode
+                title, image_url = quick_fields
+                brand = categories = bullet_points = description = None
+                bestseller_rank = price_per_unit = product_details = None
+            else:
+                # parse using BeautifulSoup
+                soup = self._make_soup(html_content, html_file)
+                if soup.find() is None:
+                    # nothing matched the strainer, the page layout may have changed
+                    logger.info(f"No product sections found in {html_file}, parsing the full page")
+                    soup = self._make_soup(html_content, html_file, parse_only=None)
+                
+                # product details
+                nodes = self._index_nodes(soup)
+                title = self._extract_title(nodes)
+                brand = self._extract_brand(nodes)
+                categories = self._extract_categories(nodes)
+                bullet_points = self._extract_bullet_points(nodes)
+                description = self._extract_description(nodes)
+                bestseller_rank = self._extract_bestseller_rank(nodes, _BEST_SELLERS_BYTES in html_content)
+                price_per_unit = self._extract_price_per_unit(nodes)
+                product_details = self._extract_product_details_table(nodes)
+                image_url = self._extract_image_url(nodes)
             
             # result object
-            result = {
-                'asin': asin,
-                'search_term': search_term,
-                'scrape_date': datetime_info.get('scrape_date'),
-                'scrape_time': datetime_info.get('scrape_time'),
-                'title': title,
-                'brand': brand,
-                'categories': categories,
-                'bullet_points': bullet_points,
-                'description': description,
-                'bestseller_rank': bestseller_rank,
-                'price_per_unit': price_per_unit,
-                'product_details': product_details,
-                'image_url': image_url
-            }
+            result = ProductRecord(
+                asin=asin,
+                search_term=search_term,
+                scrape_date=datetime_info.get('scrape_date'),
+                scrape_time=datetime_info.get('scrape_time'),
+                title=title,
+                brand=brand,
+                # list fields stored as "|" joined strings
+                categories='|'.join(categories) if categories is not None else None,
+                bullet_points='|'.join(bullet_points) if bullet_points is not None else None,
+                description=description,
+                bestseller_rank=bestseller_rank,
+                price_per_unit=price_per_unit,
+                product_details=product_details,
+                image_url=image_url
+            )
             
             logger.info(f"Successfully parsed product ASIN {asin}")
             return result
@@ -352,11 +601,92 @@ class AmazonProductHTMLParser:
             logger.error(f"Error parsing file {html_file}: {e}")
             return None
 
-    def parse_search_term_directory(self, search_term):
-        all_results = []
+    def _cache_key(self, html_file, search_term):
+        # unchanged files (same path, mtime and size) map to the same key
+        stat = os.stat(html_file)
+        return f"{CACHE_VERSION}:{int(self.quick)}:{search_term}:{html_file}:{stat.st_mtime_ns}:{stat.st_size}"
+
+    def _parse_uncached(self, html_files, search_terms):
+        if self.workers > 1 and len(html_files) > 1:
+            log_queue = multiprocessing.Queue()
+            listener = logging.handlers.QueueListener(log_queue, *logging.getLogger().handlers,
+                                                      respect_handler_level=True)
+            listener.start()
+            try:
+                with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                         initargs=(log_queue, self.html_dir, self.quick)) as ex:
+                    yield from ex.map(_parse_one, html_files, search_terms, chunksize=8)
+            finally:
+                listener.stop()
+        else:
+            for html_file, search_term in zip(html_files, search_terms):
+                yield self.parse_product_html_file(html_file, search_term)
+
+    def _parse_files(self, html_files, search_terms):
+        # results come back in the order of html_files, None for files that failed,
+        # streamed as they are parsed unless the cache is in use
+        if not self.cache_path:
+            return self._parse_uncached(html_files, search_terms)
         
+        with shelve.open(self.cache_path) as cache:
+            keys = [self._cache_key(html_file, search_term) for html_file, search_term in zip(html_files, search_terms)]
+            results = [cache.get(key) for key in keys]
+            missing = [i for i, result in enumerate(results) if result is None]
+            
+            if missing:
+                parsed = self._parse_uncached([html_files[i] for i in missing], [search_terms[i] for i in missing])
+                for i, result in zip(missing, parsed):
+                    results[i] = result
+                    if result:
+                        cache[keys[i]] = result
+            
+            logger.info(f"Reused {len(html_files) - len(missing)} cached results, parsed {len(missing)} files")
+        return results
+
+    def _list_html_files(self, term_dir):
+        with os.scandir(term_dir) as entries:
+            return [e.path for e in entries if e.name.endswith((".html", ".html.gz")) and e.is_file()]
+
+    def _index_html_files(self):
+        # (search term, html files) for every term directory, built in one walk of html_dir
+        index = []
+        with os.scandir(self.html_dir) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    index.append((entry.name.replace('_', ' ').strip(), self._list_html_files(entry.path)))
+        return index
+
+    def iter_products(self, search_term=None):
+        # yields one product record at a time, files of every search term go through one pool
+        if search_term:
+            term_dir = os.path.join(self.html_dir, _SAFE_TERM_RE.sub('_', search_term))
+            if not os.path.exists(term_dir):
+                logger.error(f"Search term directory not found: {term_dir}")
+                return
+            file_index = [(search_term, self._list_html_files(term_dir))]
+        else:
+            file_index = self._index_html_files()
+        
+        html_files = []
+        file_terms = []
+        for term, term_files in file_index:
+            html_files.extend(term_files)
+            file_terms.extend([term] * len(term_files))
+        
+        for result in self._parse_files(html_files, file_terms):
+            if not result:
+                continue
+            yield result._asdict()
+
+    def _records_to_dataframe(self, records):
+        # DataFrame built column by column from the record tuples
+        columns = zip(*records)
+        df = pd.DataFrame({field: list(values) for field, values in zip(PRODUCT_FIELDS, columns)})
+        return df.astype({col: 'category' for col in CATEGORY_FIELDS})
+
+    def parse_search_term_directory(self, search_term):
         # safe search term for directory lookup
-        safe_term = re.sub(r'[^a-zA-Z0-9]', '_', search_term)
+        safe_term = _SAFE_TERM_RE.sub('_', search_term)
         term_dir = os.path.join(self.html_dir, safe_term)
         
         if not os.path.exists(term_dir):
@@ -364,52 +694,45 @@ class AmazonProductHTMLParser:
             return pd.DataFrame()
         
         # HTML files for this search term
-        html_files = glob.glob(os.path.join(term_dir, "*.html"))
+        html_files = self._list_html_files(term_dir)
         
-        for html_file in html_files:
-            result = self.parse_product_html_file(html_file, search_term)
-            if result:
-                all_results.append(result)
+        results = self._parse_files(html_files, [search_term] * len(html_files))
+        all_results = [result for result in results if result]
         
         if not all_results:
             logger.warning(f"No results found for search term: {search_term}")
             return pd.DataFrame()
         
-        # DataFrame
-        df = pd.DataFrame(all_results)
-        
-        # list columns to string for CSV 
-        for col in ['categories', 'bullet_points']:
-            if col in df.columns:
-                df[col] = df[col].apply(lambda x: '|'.join(x) if isinstance(x, list) else x)
+        df = self._records_to_dataframe(all_results)
         
         logger.info(f"Created DataFrame with {len(df)} products for search term: {search_term}")
         return df
 
     def parse_all_search_terms(self):
-        all_results = []
-        
-        # all search term directories
-        search_terms = [d for d in os.listdir(self.html_dir) if os.path.isdir(os.path.join(self.html_dir, d))]
+        # all search term directories and their files
+        file_index = self._index_html_files()
         
-        if not search_terms:
+        if not file_index:
             logger.error(f"No search term directories found in {self.html_dir}")
             return pd.DataFrame()
         
-        logger.info(f"Found {len(search_terms)} search term directories")
+        logger.info(f"Found {len(file_index)} search term directories")
         
-        for safe_term in search_terms:
-            search_term = safe_term.replace('_', ' ').strip()
-            
-            df = self.parse_search_term_directory(search_term)
-            if not df.empty:
-                all_results.append(df)
+        # files of every search term go through one pool, so small directories do not leave workers idle
+        html_files = []
+        file_terms = []
+        for search_term, term_files in file_index:
+            html_files.extend(term_files)
+            file_terms.extend([search_term] * len(term_files))
+        
+        results = self._parse_files(html_files, file_terms)
+        all_results = [result for result in results if result]
         
         if not all_results:
             logger.warning("No results found in any search term directory")
             return pd.DataFrame()
         
-        combined_df = pd.concat(all_results, ignore_index=True)
+        combined_df = self._records_to_dataframe(all_results)
         logger.info(f"Created combined DataFrame with {len(combined_df)} products from all search terms")
         
         return combined_df
@@ -420,32 +743,81 @@ def main():
     parser.add_argument("--html-dir", required=True, help="directory")
     parser.add_argument("--search-term", help="specific term")
     parser.add_argument("--output", default="amazon_product_results.csv", help="csv")
-    parser.add_argument("--format", choices=["csv", "json", "both"], default="both", 
-                       help="both csv and json)")
+    parser.add_argument("--format", choices=["csv", "json", "both", "parquet"], default="both", 
+                       help="both csv and json), parquet needs pyarrow")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="number of parsing processes (default: cpu count)")
+    parser.add_argument("--cache", help="cache file for parsed results, unchanged files are not parsed again")
+    parser.add_argument("--quick", action="store_true",
+                        help="only extract asin, date, title and image url, without parsing the whole page")
     
     args = parser.parse_args()
+    # JSON and Parquet outputs sit next to the CSV, whatever its extension
+    output_base = os.path.splitext(args.output)[0]
+    if args.format == "both" and args.output == output_base + '.json':
+        parser.error("--output must not end in .json when writing both CSV and JSON")
     
     try:
-        html_parser = AmazonProductHTMLParser(args.html_dir)
+        html_parser = AmazonProductHTMLParser(args.html_dir, workers=args.workers, cache_path=args.cache,
+                                              quick=args.quick)
         
         if args.search_term:
             logger.info(f"Parsing products for queries: {args.search_term}")
-            results_df = html_parser.parse_search_term_directory(args.search_term)
         else:
             logger.info("Parsing products for all queries")
-            results_df = html_parser.parse_all_search_terms()
         
-        if results_df.empty:
-            logger.error("no results were found")
+        if args.format == "parquet":
+            if args.search_term:
+                results_df = html_parser.parse_search_term_directory(args.search_term)
+            else:
+                results_df = html_parser.parse_all_search_terms()
+            
+            if results_df.empty:
+                logger.error("no results were found")
+            else:
+                parquet_output = output_base + '.parquet'
+                # product_details keys differ between products, stored as a JSON string column
+                results_df['product_details'] = [orjson.dumps(details).decode() if details is not None else None
+                                                 for details in results_df['product_details']]
+                results_df.to_parquet(parquet_output, index=False, compression='zstd')
+                logger.info(f"Results saved to {parquet_output}")
         else:
-            if args.format in ["csv", "both"]:
-                results_df.to_csv(args.output, index=False, encoding='utf-8-sig')
-                logger.info(f"Results saved to {args.output}")
-                
-            if args.format in ["json", "both"]:
-                json_output = args.output.replace('.csv', '.json')
-                results_df.to_json(json_output, orient='records', indent=4)
-                logger.info(f"Results saved to {json_output}")
+            json_output = output_base + '.json'
+            write_csv = args.format in ["csv", "both"]
+            write_json = args.format in ["json", "both"]
+            outputs = []
+            if write_csv:
+                outputs.append(args.output)
+            if write_json:
+                outputs.append(json_output)
+            
+            # every record goes to the CSV row writer and/or one NDJSON line as soon as it is parsed
+            count = 0
+            with contextlib.ExitStack() as stack:
+                csv_writer = json_file = None
+                for record in html_parser.iter_products(args.search_term):
+                    # outputs are only opened once there is a record, an empty run keeps earlier results
+                    if not count:
+                        if write_csv:
+                            csv_file = stack.enter_context(open(args.output, 'w', newline='', encoding='utf-8-sig'))
+                            # same layout as DataFrame.to_csv: missing values empty, platform line endings
+                            csv_writer = csv.DictWriter(csv_file, fieldnames=PRODUCT_FIELDS, lineterminator=os.linesep)
+                            csv_writer.writeheader()
+                        if write_json:
+                            json_file = stack.enter_context(open(json_output, 'wb'))
+                    
+                    if csv_writer:
+                        csv_writer.writerow(record)
+                    if json_file:
+                        json_file.write(orjson.dumps(record))
+                        json_file.write(b'\n')
+                    count += 1
+            
+            if not count:
+                logger.error("no results were found")
+            else:
+                for output in outputs:
+                    logger.info(f"{count} results saved to {output}")
     
     except Exception as e:
         logger.error(f"error occurred: {e}")
@@ -11,6 +11,10 @@ import logging
 import re
 import os
 import schedule
+import asyncio
+import httpx
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import argparse
 
@@ -24,16 +28,81 @@ logging.basicConfig(
     ]
 )
 logger = logging.getLogger(__name__)
+# httpx logs every request at INFO
+logging.getLogger('httpx').setLevel(logging.WARNING)
+
+USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/92.0.4515.159 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/93.0.4577.82 Safari/537.36"
+]
+
+_SAFE_TERM_RE = re.compile(r'[^a-zA-Z0-9]')
+
+# Present in every search page that has results, missing from captcha / bot-check pages
+RESULTS_MARKER = 'data-component-type="s-search-result"'
+
+
+class RateLimiter:
+    """Token bucket shared by all fetchers, allows `rate` requests per second on average"""
+
+    def __init__(self, rate, burst=1):
+        # a zero rate divides by zero when waiting for a token, a negative one never refills
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _take(self):
+        """Take a token if one is available, otherwise return the seconds until the next one"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        """Block the calling thread until a request may be sent"""
+        wait = self._take()
+        while wait:
+            time.sleep(wait)
+            wait = self._take()
+
+    async def acquire_async(self):
+        """Same as acquire, without blocking the event loop"""
+        wait = self._take()
+        while wait:
+            await asyncio.sleep(wait)
+            wait = self._take()
+
+
+def search_url(search_term, page_number):
+    """Build the search results URL for a term and page"""
+    return f"https://www.amazon.com.be/s?k={search_term.replace(' ', '+')}&page={page_number}&language=en_GB"
 
 
 class AmazonHTMLScraper:
     def __init__(self):
+        # Chrome is started on the first page that needs it
         self.driver = None
         self.wait = None
-        self.setup_driver()
         # Create base directory for HTML files
         self.base_dir = "amazon_html_data_1"
         os.makedirs(self.base_dir, exist_ok=True)
+        # search term -> directory-safe name, every term is saved for 10 pages
+        self._safe_terms = {}
+        # Plain HTTP session tried before the browser, keeps connections alive between pages
+        self.session = httpx.Client(
+            headers={"User-Agent": random.choice(USER_AGENTS), "Accept-Language": "en-GB,en;q=0.9"},
+            timeout=10,
+            follow_redirects=True
+        )
 
     def setup_driver(self):
         """Initialize Chrome driver with optimal settings for data collection"""
@@ -46,12 +115,7 @@ class AmazonHTMLScraper:
         chrome_options.add_experimental_option('useAutomationExtension', False)
 
         # Add randomized user agent
-        user_agents = [
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/92.0.4515.159 Safari/537.36",
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/93.0.4577.82 Safari/537.36"
-        ]
-        chrome_options.add_argument(f'user-agent={random.choice(user_agents)}')
+        chrome_options.add_argument(f'user-agent={random.choice(USER_AGENTS)}')
 
         # Add preferences to appear more like a regular user
         chrome_options.add_experimental_option("prefs", {
@@ -66,7 +130,7 @@ class AmazonHTMLScraper:
 
         # Execute CDP commands to make detection harder
         self.driver.execute_cdp_cmd('Network.setUserAgentOverride', {
-            "userAgent": random.choice(user_agents)
+            "userAgent": random.choice(USER_AGENTS)
         })
 
         # Add additional JavaScript to mask automation
@@ -82,21 +146,43 @@ class AmazonHTMLScraper:
         extra_delay=random.uniform(0,2) if random.random()< 0.1 else 0  # 10% chance of extra delay
         time.sleep(base_delay + extra_delay)
 
-    def get_search_page_html(self, search_term, page_number=1):
+    def _get_page_over_http(self, url):
+        """Return the page HTML if a plain GET already contains search results, otherwise None"""
+        try:
+            response = self.session.get(url)
+        except httpx.HTTPError as e:
+            logger.warning(f"HTTP request failed for {url}: {str(e)}")
+            return None
+        
+        if response.status_code == 200 and RESULTS_MARKER in response.text:
+            return response.text
+        return None
+
+    def get_search_page_html(self, search_term, page_number=1, try_http=False):
         """
         Get the full HTML of a search results page
         
         Args:
             search_term (str): The search term
             page_number (int): The page number to retrieve (default: 1)
+            try_http (bool): Try a plain HTTP request before the browser (default: False)
             
         Returns:
             str: The HTML content of the page
         """
         try:
-            url = f"https://www.amazon.com.be/s?k={search_term.replace(' ', '+')}&page={page_number}&language=en_GB"
+            url = search_url(search_term, page_number)
             logger.info(f"Retrieving URL: {url}")
             
+            # Results are rendered server-side, Chrome is only needed for captcha / bot-check pages
+            if try_http:
+                html_content = self._get_page_over_http(url)
+                if html_content:
+                    return html_content
+                logger.info(f"No search results over HTTP for '{search_term}' page {page_number}, using the browser")
+            
+            if self.driver is None:
+                self.setup_driver()
             self.driver.get(url)
             self._random_delay()
             
@@ -129,7 +215,9 @@ class AmazonHTMLScraper:
             return
             
         # Create directory structure: base_dir/search_term/date/hour_minute/
-        safe_term = re.sub(r'[^a-zA-Z0-9]', '_', search_term)
+        safe_term = self._safe_terms.get(search_term)
+        if safe_term is None:
+            safe_term = self._safe_terms[search_term] = _SAFE_TERM_RE.sub('_', search_term)
         date_str = timestamp.strftime("%Y-%m-%d")
         time_str = timestamp.strftime("%H-%M-%S")
         hour_minute_str = timestamp.strftime("%H-%M")
@@ -152,16 +240,90 @@ class AmazonHTMLScraper:
 
     def close(self):
         """Clean up resources"""
+        self.session.close()
         if self.driver:
             self.driver.quit()
 
 
-def scrape_search_pages(input_csv):
+async def _fetch_search_page(client, semaphore, rate_limiter, search_term, page_number):
+    """Fetch one search results page over HTTP, None when Amazon did not return results"""
+    url = search_url(search_term, page_number)
+    async with semaphore:
+        await rate_limiter.acquire_async()
+        try:
+            response = await client.get(url)
+        except httpx.HTTPError as e:
+            logger.warning(f"HTTP request failed for '{search_term}' page {page_number}: {str(e)}")
+            return None
+    
+    if response.status_code != 200 or RESULTS_MARKER not in response.text:
+        logger.info(f"No search results over HTTP for '{search_term}' page {page_number} (status {response.status_code})")
+        return None
+    return response.text
+
+
+async def fetch_search_pages(search_terms, pages, rate_limiter, save_page, concurrency=20):
+    """
+    Fetch search result pages concurrently without a browser, saving each one as it arrives
+    
+    Args:
+        search_terms (list): The search terms
+        pages (iterable): Page numbers to fetch for every term
+        rate_limiter (RateLimiter): Limiter shared with the browser fetches
+        save_page (callable): Called with (html_content, search_term, page_number) for every fetched page
+        concurrency (int): Maximum number of requests in flight (default: 20)
+        
+    Returns:
+        list: (search_term, page_number) pairs that need the browser
+    """
+    keys = [(search_term, page) for search_term in search_terms for page in pages]
+    headers = {
+        "User-Agent": random.choice(USER_AGENTS),
+        "Accept-Language": "en-GB,en;q=0.9"
+    }
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async with httpx.AsyncClient(headers=headers, timeout=15, follow_redirects=True,
+                                 limits=httpx.Limits(max_connections=50)) as client:
+        async def fetch_and_save(search_term, page):
+            html_content = await _fetch_search_page(client, semaphore, rate_limiter, search_term, page)
+            if html_content is None:
+                return False
+            # saved right away, a crash later in the run keeps the pages fetched so far
+            save_page(html_content, search_term, page)
+            return True
+        
+        fetched = await asyncio.gather(*(fetch_and_save(search_term, page) for search_term, page in keys))
+    return [key for key, ok in zip(keys, fetched) if not ok]
+
+
+def scrape_search_term(scraper, search_term, timestamp):
+    """
+    Save search result pages 1-10 for one search term
+    
+    Args:
+        scraper (AmazonHTMLScraper): Scraper owned by the calling thread
+        search_term (str): The search term
+        timestamp (datetime): The timestamp of the scraping run
+    """
+    for page in range(1, 11):
+        html_content = scraper.get_search_page_html(search_term, page)
+        scraper.save_html_to_file(html_content, search_term, page, timestamp)
+        
+        # Add delay between pages
+        if page < 10:
+            time.sleep(random.uniform(1, 3))
+
+
+def scrape_search_pages(input_csv, workers=1, use_http=False, rate=0.3):
     """
     Scrape search pages for all terms in the input CSV
     
     Args:
         input_csv (str): Path to the input CSV file containing search terms
+        workers (int): Number of browsers scraping search terms in parallel (default: 1)
+        use_http (bool): Fetch pages over plain HTTP, the browser only handles blocked pages
+        rate (float): Requests per second allowed with use_http (default: 0.3)
     """
     try:
         # Read search terms from CSV
@@ -175,30 +337,59 @@ def scrape_search_pages(input_csv):
             logger.error("No valid search terms found in input CSV")
             return
             
-        logger.info(f"Starting HTML scraping for {len(search_terms)} search terms")
-        
-        scraper = AmazonHTMLScraper()
         timestamp = datetime.now()
         
-        try:
-            for i, search_term in enumerate(search_terms):
-                logger.info(f"Processing search term {i + 1}/{len(search_terms)}: {search_term}")
-                
-                # Get 3 pages for each search term
-                for page in range(1, 11):
+        if use_http:
+            logger.info(f"Starting HTTP scraping for {len(search_terms)} search terms")
+            # One limit for the HTTP requests and the browser fallback
+            rate_limiter = RateLimiter(rate)
+            
+            # a browser is only launched if some page came back without results
+            scraper = AmazonHTMLScraper()
+            try:
+                missing = asyncio.run(fetch_search_pages(
+                    search_terms, range(1, 11), rate_limiter,
+                    lambda html_content, search_term, page: scraper.save_html_to_file(html_content, search_term, page, timestamp)
+                ))
+                for search_term, page in missing:
+                    rate_limiter.acquire()
                     html_content = scraper.get_search_page_html(search_term, page)
                     scraper.save_html_to_file(html_content, search_term, page, timestamp)
-                    
-                    # Add delay between pages
-                    if page < 10:
-                        time.sleep(random.uniform(1, 3))
-                
-                # Add longer pause between search terms
-                if i < len(search_terms) - 1:
-                    time.sleep(random.uniform(3, 7))
-                    
+            finally:
+                scraper.close()
+            
+            logger.info("HTML scraping completed successfully")
+            return
+        
+        workers = max(1, min(workers, len(search_terms)))
+        logger.info(f"Starting HTML scraping for {len(search_terms)} search terms with {workers} browser(s)")
+        
+        # each worker thread drives its own browser, created on its first search term
+        thread_state = threading.local()
+        scrapers = []
+        scrapers_lock = threading.Lock()
+        
+        def process_term(i, search_term):
+            scraper = getattr(thread_state, 'scraper', None)
+            if scraper is None:
+                scraper = AmazonHTMLScraper()
+                thread_state.scraper = scraper
+                with scrapers_lock:
+                    scrapers.append(scraper)
+            
+            logger.info(f"Processing search term {i + 1}/{len(search_terms)}: {search_term}")
+            scrape_search_term(scraper, search_term, timestamp)
+            
+            # Add longer pause between search terms
+            if i < len(search_terms) - 1:
+                time.sleep(random.uniform(3, 7))
+        
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(process_term, range(len(search_terms)), search_terms))
         finally:
-            scraper.close()
+            for scraper in scrapers:
+                scraper.close()
             
         logger.info("HTML scraping completed successfully")
         
@@ -206,13 +397,13 @@ def scrape_search_pages(input_csv):
         logger.error(f"Error in scrape_search_pages: {str(e)}")
 
 
-def run_scheduled_job(input_csv):
+def run_scheduled_job(input_csv, workers=1, use_http=False, rate=0.3):
     """Run the scraping job and log the execution time"""
     start_time = datetime.now()
     logger.info(f"Starting scheduled scraping job at {start_time}")
     
     try:
-        scrape_search_pages(input_csv)
+        scrape_search_pages(input_csv, workers, use_http, rate)
         end_time = datetime.now()
         duration = (end_time - start_time).total_seconds() / 60
         logger.info(f"Completed scheduled job in {duration:.2f} minutes")
@@ -220,18 +411,21 @@ def run_scheduled_job(input_csv):
         logger.error(f"Error in scheduled job: {str(e)}")
 
 
-def schedule_jobs(input_csv):
+def schedule_jobs(input_csv, workers=1, use_http=False, rate=0.3):
     """
     Schedule the scraping job to run at specific even hours: 0,2,4,6,8,10,12,14,16,18,20,22
     
     Args:
         input_csv (str): Path to the input CSV file
+        workers (int): Number of browsers scraping in parallel
+        use_http (bool): Fetch pages over plain HTTP first
+        rate (float): Requests per second allowed with use_http
     """
     logger.info("Setting up schedule to run at even hours (0,2,4,6,8,10,12,14,16,18,20,22)")
     
     # Schedule for every even hour
     for hour in [0, 2, 4, 6, 8, 10, 12, 14, 16, 18, 20, 22]:
-        schedule.every().day.at(f"{hour:02d}:00").do(run_scheduled_job, input_csv)
+        schedule.every().day.at(f"{hour:02d}:00").do(run_scheduled_job, input_csv, workers, use_http, rate)
         logger.info(f"Scheduled job for {hour:02d}:00")
     
     # Determine if we should run immediately
@@ -242,11 +436,11 @@ def schedule_jobs(input_csv):
         # We're at an even hour, check if we've just missed the scheduled time
         if current_minute > 5:  # If more than 5 minutes past the hour, run now
             logger.info(f"Current time is {current_hour}:{current_minute}, running job immediately")
-            run_scheduled_job(input_csv)
+            run_scheduled_job(input_csv, workers, use_http, rate)
     else:
         # Current hour is odd, run immediately
         logger.info(f"Current hour ({current_hour}) is not in schedule. Running job immediately.")
-        run_scheduled_job(input_csv)
+        run_scheduled_job(input_csv, workers, use_http, rate)
     
     # Keep the script running to execute scheduled jobs
     logger.info("Entering schedule loop. Press Ctrl+C to exit.")
@@ -258,10 +452,25 @@ def schedule_jobs(input_csv):
         logger.info("Schedule interrupted by user")
 
 
+def positive_float(value):
+    """argparse type for a float greater than zero"""
+    number = float(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"must be greater than 0, got {value}")
+    return number
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Collect Amazon search results HTML for tracking')
     parser.add_argument('input_csv', help='Path to input CSV file containing search terms')
     parser.add_argument('--run-once', action='store_true', help='Run once without scheduling')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Number of browsers scraping search terms in parallel (default: 1)')
+    parser.add_argument('--http', action='store_true',
+                        help='Fetch search pages concurrently over plain HTTP (throttled by --rate), using the browser '
+                             'only for blocked pages; without it every page is loaded in the browser')
+    parser.add_argument('--rate', type=positive_float, default=0.3,
+                        help='Maximum page requests per second with --http (default: 0.3)')
     
     args = parser.parse_args()
     
@@ -270,10 +479,10 @@ if __name__ == "__main__":
         
         if args.run_once:
             logger.info("Running once without scheduling")
-            scrape_search_pages(args.input_csv)
+            scrape_search_pages(args.input_csv, args.workers, args.http, args.rate)
         else:
             logger.info("Setting up schedule to run at even hours (0,2,4,...,22)")
-            schedule_jobs(args.input_csv)
+            schedule_jobs(args.input_csv, args.workers, args.http, args.rate)
             
     except Exception as e:
         logger.error(f"An unexpected error occurred: {str(e)}")
@@ -3,35 +3,125 @@ from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException, JavascriptException
 import time
 import random
 import logging
+import logging.handlers
 import re
 import os
+import gzip
+import asyncio
+import httpx
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import argparse
 
-# Configure logging
+# Configure logging, file writes are buffered and flushed every 100 records (or on warnings and errors)
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+_log_file_handler = logging.FileHandler('amazon_product_scraper.log')
+# basicConfig only formats the handlers it is given, not the MemoryHandler's target
+_log_file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
+    format=LOG_FORMAT,
     handlers=[
-        logging.FileHandler('amazon_product_scraper.log'),
+        logging.handlers.MemoryHandler(100, flushLevel=logging.WARNING, target=_log_file_handler),
         logging.StreamHandler()
     ]
 )
 logger = logging.getLogger(__name__)
+# httpx logs every request at INFO
+logging.getLogger('httpx').setLevel(logging.WARNING)
+
+USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/92.0.4515.159 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/93.0.4577.82 Safari/537.36"
+]
+
+_SAFE_TERM_RE = re.compile(r'[^a-zA-Z0-9]')
+
+BASE_DIR = "amazon_product_html_data"
+
+# Subresources the saved HTML does not need, blocked in the browser
+BLOCKED_URLS = ['*.jpg', '*.jpeg', '*.png', '*.gif', '*.webp', '*.svg',
+                '*.css', '*.woff', '*.woff2', '*.mp4', '*.ico']
+
+# Present in real product pages, missing from captcha / bot-check pages
+PRODUCT_MARKER = 'id="productTitle"'
+
+
+def product_url(asin):
+    """Build the product page URL for an ASIN"""
+    return f"https://www.amazon.com.be/dp/{asin}?language=en_GB"
+
+
+class RateLimiter:
+    """Token bucket shared by all fetchers, allows `rate` requests per second on average"""
+
+    def __init__(self, rate, burst=1):
+        # a zero rate divides by zero when waiting for a token, a negative one never refills
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _take(self):
+        """Take a token if one is available, otherwise return the seconds until the next one"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        """Block the calling thread until a request may be sent"""
+        wait = self._take()
+        while wait:
+            time.sleep(wait)
+            wait = self._take()
+
+    async def acquire_async(self):
+        """Same as acquire, without blocking the event loop"""
+        wait = self._take()
+        while wait:
+            await asyncio.sleep(wait)
+            wait = self._take()
 
 
 class AmazonProductHTMLScraper:
-    def __init__(self):
+    def __init__(self, compress=False):
+        # Chrome is started on the first page that needs it
         self.driver = None
         self.wait = None
-        self.setup_driver()
         
         # Create base directory for HTML files
-        self.base_dir = "amazon_product_html_data"
+        self.base_dir = BASE_DIR
         os.makedirs(self.base_dir, exist_ok=True)
+        
+        # Keep-alive HTTP session tried before the browser
+        self.session = httpx.Client(
+            headers={"User-Agent": random.choice(USER_AGENTS), "Accept-Language": "en-GB,en;q=0.9"},
+            timeout=15,
+            follow_redirects=True,
+            limits=httpx.Limits(max_keepalive_connections=8)
+        )
+        
+        # Files are written in the background while the next page is fetched
+        self._writer = ThreadPoolExecutor(max_workers=2)
+        # search term -> its directory, sanitized and created once per term
+        self._term_dirs = {}
+        # Save pages gzip-compressed (.html.gz), pp_parser.py reads both
+        self.compress = compress
 
     def setup_driver(self):
         """Initialize Chrome driver with optimal settings for data collection"""
@@ -40,16 +130,14 @@ class AmazonProductHTMLScraper:
         chrome_options.add_argument("--disable-gpu")
         chrome_options.add_argument("--disable-notifications")
         chrome_options.add_argument("--disable-popup-blocking")
+        # Only the HTML document is saved, skip image decoding and per-site renderer processes
+        chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+        chrome_options.add_argument("--disable-features=IsolateOrigins,site-per-process")
         chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
         chrome_options.add_experimental_option('useAutomationExtension', False)
 
         # Add randomized user agent
-        user_agents = [
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/92.0.4515.159 Safari/537.36",
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/93.0.4577.82 Safari/537.36"
-        ]
-        chrome_options.add_argument(f'user-agent={random.choice(user_agents)}')
+        chrome_options.add_argument(f'user-agent={random.choice(USER_AGENTS)}')
 
         # Add preferences to appear more like a regular user
         chrome_options.add_experimental_option("prefs", {
@@ -60,13 +148,18 @@ class AmazonProductHTMLScraper:
         })
 
         self.driver = webdriver.Chrome(options=chrome_options)
-        self.wait = WebDriverWait(self.driver, 5)
+        # the readiness check can hit a document that is being replaced, just poll again
+        self.wait = WebDriverWait(self.driver, 5, ignored_exceptions=(JavascriptException,))
 
         # Execute CDP commands to make detection harder
         self.driver.execute_cdp_cmd('Network.setUserAgentOverride', {
-            "userAgent": random.choice(user_agents)
+            "userAgent": random.choice(USER_AGENTS)
         })
 
+        # Don't download images, stylesheets, fonts or videos
+        self.driver.execute_cdp_cmd('Network.enable', {})
+        self.driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_URLS})
+
         # Add additional JavaScript to mask automation
         self.driver.execute_script("""
             Object.defineProperty(navigator, 'webdriver', {
@@ -74,31 +167,60 @@ class AmazonProductHTMLScraper:
             });
         """)
 
-    def _random_delay(self, min_seconds=3, max_seconds=7):
-        """Implements humanized delay between actions"""
-        base_delay = random.uniform(min_seconds, max_seconds)
-        extra_delay = random.uniform(0, 2) if random.random() < 0.1 else 0  # 10% chance of extra delay
-        time.sleep(base_delay + extra_delay)
+    def _get_page_over_http(self, url):
+        """Return the page HTML if a plain GET returned the product page, otherwise None"""
+        try:
+            response = self.session.get(url)
+        except httpx.HTTPError as e:
+            logger.warning(f"HTTP request failed for {url}: {str(e)}")
+            return None
+        
+        if response.status_code == 200 and PRODUCT_MARKER in response.text:
+            return response.text
+        return None
 
-    def get_product_page_html(self, asin):
+    def get_product_page_html(self, asin, try_http=True):
         """
         Get the full HTML of a product page
         
         Args:
             asin (str): The Amazon Standard Identification Number
+            try_http (bool): Try the HTTP session before the browser (default: True)
             
         Returns:
             str: The HTML content of the page
         """
         try:
-            url = f"https://www.amazon.com.be/dp/{asin}?language=en_GB"
-            logger.info(f"Retrieving URL: {url}")
+            url = product_url(asin)
+            logger.debug(f"Retrieving URL: {url}")
+            
+            # The browser is only needed for captcha / 503 responses
+            if try_http:
+                html_content = self._get_page_over_http(url)
+                if html_content:
+                    return html_content
+                logger.debug(f"No product page over HTTP for ASIN '{asin}', using the browser")
+            
+            if self.driver is None:
+                self.setup_driver()
             
-            self.driver.get(url)
-            self._random_delay()
+            # Navigate over CDP and stop once the DOM is parsed, images and styles are blocked anyway.
+            # The marker on the current document tells it apart from the page being loaded.
+            self.driver.execute_script("document.__previousPage = true;")
+            self.driver.execute_cdp_cmd('Page.navigate', {'url': url, 'transitionType': 'typed'})
+            try:
+                self.wait.until(lambda driver: driver.execute_script(
+                    "return !document.__previousPage && document.readyState !== 'loading'"))
+            except TimeoutException:
+                # The document may still be the previous product or a page that never got its title,
+                # saving it under this ASIN would make resume skip the product for good
+                if (self.driver.execute_script("return !!document.__previousPage")
+                        or PRODUCT_MARKER not in self.driver.page_source):
+                    logger.warning(f"Timeout waiting for product page to load for ASIN '{asin}'")
+                    return ""
             
-            # Just wait for page load - no specific element needed as we're just capturing HTML
-            time.sleep(2)  # Give the page a moment to fully load
+            # Short jitter so page loads are not perfectly regular
+            time.sleep(random.uniform(0.2, 0.8))
             
             # Return the full HTML
             return self.driver.page_source
@@ -121,87 +243,246 @@ class AmazonProductHTMLScraper:
             return
             
         # Create directory structure: base_dir/search_term/
-        # Create safe directory name from search term
-        safe_term = re.sub(r'[^a-zA-Z0-9]', '_', search_term)
+        term_dir = self._term_dirs.get(search_term)
+        if term_dir is None:
+            # Create safe directory name from search term
+            safe_term = _SAFE_TERM_RE.sub('_', search_term)
+            term_dir = os.path.join(self.base_dir, safe_term)
+            os.makedirs(term_dir, exist_ok=True)
+            self._term_dirs[search_term] = term_dir
         
         # Create timestamp for the filename
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
-        # Create search term directory
-        term_dir = os.path.join(self.base_dir, safe_term)
-        os.makedirs(term_dir, exist_ok=True)
-        
         # Create filename with ASIN and timestamp
-        filename = f"{asin}_{timestamp}.html"
+        filename = f"{asin}_{timestamp}.html.gz" if self.compress else f"{asin}_{timestamp}.html"
         filepath = os.path.join(term_dir, filename)
         
-        # Save the HTML content
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(html_content)
-            
-        logger.info(f"Saved HTML for ASIN '{asin}' (search term: '{search_term}') to {filepath}")
+        # Save the HTML content without waiting for the disk
+        self._writer.submit(self._write_html_file, filepath, html_content, asin, search_term)
+
+    def _write_html_file(self, filepath, html_content, asin, search_term):
+        """Write one page to disk, runs on the writer threads"""
+        try:
+            if self.compress:
+                # level 3 keeps most of the size reduction at a fraction of the CPU cost of level 9
+                with gzip.open(filepath, 'wt', encoding='utf-8', compresslevel=3) as f:
+                    f.write(html_content)
+            else:
+                with open(filepath, 'w', encoding='utf-8') as f:
+                    f.write(html_content)
+                
+            logger.debug(f"Saved HTML for ASIN '{asin}' (search term: '{search_term}') to {filepath}")
+        except Exception as e:
+            logger.error(f"Error saving HTML for ASIN '{asin}' to {filepath}: {str(e)}")
 
     def close(self):
         """Clean up resources"""
+        # Let pending writes finish first
+        self._writer.shutdown(wait=True)
+        self.session.close()
         if self.driver:
             self.driver.quit()
 
 
-def scrape_product_pages(input_csv):
+def scraped_products(base_dir):
+    """
+    Find the products already saved under base_dir
+    
+    Args:
+        base_dir (str): Directory holding one sub-directory per search term
+        
+    Returns:
+        set: (safe search term, ASIN) pairs with at least one saved page
+    """
+    saved = set()
+    if not os.path.isdir(base_dir):
+        return saved
+    
+    with os.scandir(base_dir) as term_entries:
+        for term_entry in term_entries:
+            if not term_entry.is_dir():
+                continue
+            with os.scandir(term_entry.path) as entries:
+                for entry in entries:
+                    if entry.name.endswith((".html", ".html.gz")):
+                        # files are named <asin>_<timestamp>.html[.gz]
+                        saved.add((term_entry.name, entry.name.split('_')[0]))
+    return saved
+
+
+async def _fetch_product_page(client, semaphore, rate_limiter, asin):
+    """Fetch one product page over HTTP, None when Amazon returned a bot check instead"""
+    url = product_url(asin)
+    async with semaphore:
+        await rate_limiter.acquire_async()
+        try:
+            response = await client.get(url)
+        except httpx.HTTPError as e:
+            logger.warning(f"HTTP request failed for ASIN '{asin}': {str(e)}")
+            return None
+    
+    if response.status_code != 200 or PRODUCT_MARKER not in response.text:
+        logger.debug(f"No product page over HTTP for ASIN '{asin}' (status {response.status_code})")
+        return None
+    return response.text
+
+
+async def fetch_product_pages(asins, rate_limiter, concurrency=16):
+    """
+    Fetch product pages concurrently without a browser
+    
+    Args:
+        asins (list): The product ASINs
+        rate_limiter (RateLimiter): Limiter shared with the browser fetches
+        concurrency (int): Maximum number of requests in flight (default: 16)
+        
+    Returns:
+        dict: ASIN -> HTML, None for pages that need the browser
+    """
+    headers = {
+        "User-Agent": random.choice(USER_AGENTS),
+        "Accept-Language": "en-GB,en;q=0.9"
+    }
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async with httpx.AsyncClient(headers=headers, timeout=15, follow_redirects=True,
+                                 limits=httpx.Limits(max_connections=50, max_keepalive_connections=32)) as client:
+        html_pages = await asyncio.gather(
+            *(_fetch_product_page(client, semaphore, rate_limiter, asin) for asin in asins)
+        )
+    return dict(zip(asins, html_pages))
+
+
+def scrape_product_pages(source, workers=1, use_http=False, rate=0.3, compress=False, resume=False,
+                         scrapers=None, saved=None):
     """
     Scrape product pages for all ASINs in the input CSV, organizing by search term
     
     Args:
-        input_csv (str): Path to the input CSV file containing ASINs and search terms
+        source (str or pd.DataFrame): Path to the input CSV file containing ASINs and search terms,
+            or a DataFrame with already validated 'asin' and 'search_term' columns
+        workers (int): Number of browsers fetching product pages in parallel (default: 1)
+        use_http (bool): Fetch pages over plain HTTP first, the browsers only handle blocked pages
+        rate (float): Requests per second allowed across all fetchers (default: 0.3)
+        compress (bool): Save pages as gzip-compressed .html.gz files (default: False)
+        resume (bool): Skip products already saved for the same search term (default: False)
+        scrapers (list): Scrapers to fetch with, kept open for the caller to reuse; by default
+            `workers` scrapers are created and closed once the scraping is done
+        saved (set): (safe search term, ASIN) pairs to skip, pages saved here are added to it so a
+            caller scraping several batches walks BASE_DIR only once; by default BASE_DIR is scanned
+            when resuming
     """
     try:
-        # Read from CSV
-        df = pd.read_csv(input_csv)
-        
         # Use fixed column names
         asin_column = 'asin'
         search_term_column = 'search_term'
         
-        # Check if the required columns exist
-        if asin_column not in df.columns:
-            logger.error(f"CSV file does not have the required 'asin' column. Available columns: {', '.join(df.columns)}")
-            return
-            
-        if search_term_column not in df.columns:
-            logger.error(f"CSV file does not have the required 'search_term' column. Available columns: {', '.join(df.columns)}")
-            return
+        if isinstance(source, pd.DataFrame):
+            # Batch handed over by the caller, already read and cleaned
+            df = source
+        else:
+            # Read the header first to check the columns
+            columns = pd.read_csv(source, nrows=0).columns
             
-        # Create a clean dataset with both ASIN and search term
-        df = df[[asin_column, search_term_column]].dropna()
+            # Check if the required columns exist
+            if asin_column not in columns:
+                logger.error(f"CSV file does not have the required 'asin' column. Available columns: {', '.join(columns)}")
+                return
+                
+            if search_term_column not in columns:
+                logger.error(f"CSV file does not have the required 'search_term' column. Available columns: {', '.join(columns)}")
+                return
+                
+            # Create a clean dataset with both ASIN and search term, other columns are never parsed
+            df = pd.read_csv(source, usecols=[asin_column, search_term_column], dtype='string').dropna()
         
         if df.empty:
             logger.error("No valid ASIN and search term pairs found in input CSV")
             return
             
-        # Convert to string to ensure proper handling
-        df[asin_column] = df[asin_column].astype(str)
-        df[search_term_column] = df[search_term_column].astype(str)
+        # Fetch every (ASIN, search term) pair once
+        total_rows = len(df)
+        df = df.drop_duplicates()
+        
+        if saved is None and resume:
+            # One directory walk for the whole batch instead of a lookup per row
+            saved = scraped_products(BASE_DIR)
+        
+        if saved is not None:
+            safe_terms = {term: _SAFE_TERM_RE.sub('_', term) for term in df[search_term_column].unique()}
+            already_saved = [(safe_terms[term], asin) in saved
+                             for asin, term in zip(df[asin_column].to_numpy(), df[search_term_column].to_numpy())]
+            df = df[~pd.Series(already_saved, index=df.index, dtype=bool)]
+        
+        if len(df) < total_rows:
+            logger.info(f"Skipping {total_rows - len(df)} duplicate or already scraped products")
+        if df.empty:
+            logger.info("All products in the input have already been scraped")
+            return
             
-        logger.info(f"Starting HTML scraping for {len(df)} products")
+        if scrapers:
+            workers = len(scrapers)
+        workers = max(1, min(workers, len(df)))
+        logger.info(f"Starting HTML scraping for {len(df)} products with {workers} browser(s)")
         
-        scraper = AmazonProductHTMLScraper()
+        # One limit for the whole run instead of a fixed sleep after every page
+        rate_limiter = RateLimiter(rate)
         
-        try:
-            for i, row in df.iterrows():
-                asin = row[asin_column]
-                search_term = row[search_term_column]
-                
-                logger.info(f"Processing product {i + 1}/{len(df)}: ASIN {asin} (search term: {search_term})")
+        html_pages = {}
+        if use_http:
+            html_pages = asyncio.run(fetch_product_pages(df[asin_column].tolist(), rate_limiter))
+            logger.info(f"Fetched {sum(1 for html in html_pages.values() if html)}/{len(df)} product pages over HTTP")
+        
+        # Pool of browsers, each product borrows one for its fetch
+        # (a browser is only launched once it has to load a page)
+        owned_scrapers = []
+        scraper_pool = queue.Queue()
+        
+        def process_product(i, asin, search_term):
+            scraper = scraper_pool.get()
+            try:
+                logger.debug(f"Processing product {i + 1}/{len(df)}: ASIN {asin} (search term: {search_term})")
                 
-                html_content = scraper.get_product_page_html(asin)
+                html_content = html_pages.get(asin)
+                if not html_content:
+                    rate_limiter.acquire()
+                    # with use_http the page already failed over HTTP
+                    html_content = scraper.get_product_page_html(asin, try_http=not use_http)
+                # a captcha or robot check page loads like any other, saving it would make resume skip the product
+                if PRODUCT_MARKER not in html_content:
+                    logger.warning(f"No product page for ASIN '{asin}', nothing saved")
+                    return
                 scraper.save_html_to_file(html_content, asin, search_term)
-                
-                # Add delay between product pages to avoid being blocked
-                if i < len(df) - 1:
-                    time.sleep(random.uniform(2, 5))
+                if saved is not None:
+                    saved.add((safe_terms[search_term], asin))
+            finally:
+                scraper_pool.put(scraper)
+        
+        try:
+            if scrapers:
+                for scraper in scrapers[:workers]:
+                    scraper_pool.put(scraper)
+            else:
+                for _ in range(workers):
+                    scraper = AmazonProductHTMLScraper(compress=compress)
+                    owned_scrapers.append(scraper)
+                    scraper_pool.put(scraper)
+            
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                # plain column values, no Series is built per row
+                rows = zip(df[asin_column].to_numpy(), df[search_term_column].to_numpy())
+                futures = [executor.submit(process_product, i, asin, search_term)
+                           for i, (asin, search_term) in enumerate(rows)]
+                for done, future in enumerate(futures, start=1):
+                    future.result()
+                    # Progress every 50 products instead of a line per product
+                    if done % 50 == 0 or done == len(futures):
+                        logger.info(f"Progress: {done}/{len(futures)} products")
                     
         finally:
-            scraper.close()
+            for scraper in owned_scrapers:
+                scraper.close()
             
         logger.info("Product HTML scraping completed successfully")
         
@@ -209,6 +490,14 @@ def scrape_product_pages(input_csv):
         logger.error(f"Error in scrape_product_pages: {str(e)}")
 
 
+def positive_float(value):
+    """argparse type for a float greater than zero"""
+    number = float(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"must be greater than 0, got {value}")
+    return number
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Collect Amazon product page HTML organized by search term')
     parser.add_argument('input_csv', help='Path to input CSV file containing product ASINs and search terms')
@@ -216,56 +505,66 @@ if __name__ == "__main__":
                         help='Number of products to process before taking a longer break (default: 100)')
     parser.add_argument('--batch-delay', type=int, default=60,
                         help='Delay in seconds between batches (default: 60)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Number of browsers fetching product pages in parallel (default: 1)')
+    parser.add_argument('--http', action='store_true',
+                        help='Fetch product pages over plain HTTP, using the browsers only for blocked pages')
+    parser.add_argument('--rate', type=positive_float, default=0.3,
+                        help='Maximum page requests per second across all fetchers (default: 0.3)')
+    parser.add_argument('--gzip', action='store_true',
+                        help='Save pages gzip-compressed as .html.gz')
+    parser.add_argument('--resume', action='store_true',
+                        help='Skip products that already have a saved page for the same search term')
     
     args = parser.parse_args()
     
     try:
         logger.info(f"Starting with input file: {args.input_csv}")
         
-        # If there are many ASINs, process them in batches
-        df = pd.read_csv(args.input_csv)
-        
         # Use fixed column names
         asin_column = 'asin'
         search_term_column = 'search_term'
         
         # Check if the required columns exist
-        if asin_column not in df.columns or search_term_column not in df.columns:
-            logger.error(f"CSV file must have both 'asin' and 'search_term' columns. Available columns: {', '.join(df.columns)}")
+        columns = pd.read_csv(args.input_csv, nrows=0).columns
+        if asin_column not in columns or search_term_column not in columns:
+            logger.error(f"CSV file must have both 'asin' and 'search_term' columns. Available columns: {', '.join(columns)}")
             exit(1)
-            
-        # Create a clean dataset
-        df = df[[asin_column, search_term_column]].dropna()
-        total_products = len(df)
         
-        if total_products <= args.batch_size:
-            # Process all at once if the number is small
-            scrape_product_pages(args.input_csv)
-        else:
-            # Process in batches
-            logger.info(f"Processing {total_products} products in batches of {args.batch_size}")
-            
-            for i in range(0, total_products, args.batch_size):
-                batch_end = min(i + args.batch_size, total_products)
-                logger.info(f"Processing batch {i//args.batch_size + 1}: Products {i+1} to {batch_end}")
-                
-                # Create temporary CSV for this batch
-                batch_df = df.iloc[i:batch_end].copy()
-                batch_csv = f"temp_batch_{i}.csv"
-                batch_df.to_csv(batch_csv, index=False)
-                
-                # Process the batch
-                scrape_product_pages(batch_csv)
-                
-                # Remove temporary file
-                os.remove(batch_csv)
-                
-                # Take a break between batches
-                if batch_end < total_products:
-                    logger.info(f"Taking a {args.batch_delay} second break before the next batch")
-                    time.sleep(args.batch_delay)
-            
-            logger.info("All batches processed successfully")
+        # If there are many ASINs, process them in batches, read one batch of rows at a time
+        logger.info(f"Processing products in batches of {args.batch_size}")
+        reader = pd.read_csv(args.input_csv, usecols=[asin_column, search_term_column], dtype='string',
+                             chunksize=args.batch_size)
+        
+        # Products saved so far, walked once and kept up to date by every batch
+        # (without resume only the pages saved in this run are skipped)
+        saved = scraped_products(BASE_DIR) if args.resume else set()
+        
+        # Browsers are launched once and reused by every batch
+        scrapers = [AmazonProductHTMLScraper(compress=args.gzip) for _ in range(max(1, args.workers))]
+        
+        processed = 0
+        try:
+            with reader:
+                for batch_number, chunk in enumerate(reader, start=1):
+                    # Take a break between batches
+                    if batch_number > 1:
+                        logger.info(f"Taking a {args.batch_delay} second break before the next batch")
+                        time.sleep(args.batch_delay)
+                    
+                    # Create a clean dataset
+                    batch_df = chunk.dropna()
+                    logger.info(f"Processing batch {batch_number}: Products {processed + 1} to {processed + len(batch_df)}")
+                    processed += len(batch_df)
+                    
+                    if not batch_df.empty:
+                        scrape_product_pages(batch_df, args.workers, args.http, args.rate,
+                                             args.gzip, args.resume, scrapers=scrapers, saved=saved)
+        finally:
+            for scraper in scrapers:
+                scraper.close()
+        
+        logger.info("All batches processed successfully")
             
     except Exception as e:
         logger.error(f"An unexpected error occurred: {str(e)}")
@@ -1,12 +1,21 @@
 import os
 import re
+import mmap
+import functools
 import pandas as pd
 import logging
-from bs4 import BeautifulSoup
-import glob
+import logging.handlers
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from bs4 import BeautifulSoup, SoupStrainer, NavigableString
+import soupsieve as sv
 from datetime import datetime
 import argparse
+import csv
+import contextlib
+import itertools
 import json
+import orjson
 
 # Configure logging
 logging.basicConfig(
@@ -19,22 +28,127 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Only the search result containers (and everything inside them) make it into the soup
+SEARCH_RESULT_ATTRS = {'data-component-type': 's-search-result'}
+SEARCH_RESULT_STRAINER = SoupStrainer('div', attrs=SEARCH_RESULT_ATTRS)
+
+# Columns of a parsed search result, in output order
+RESULT_FIELDS = ['asin', 'search_term', 'page_number', 'position', 'scrape_date', 'scrape_time', 'scrape_hour',
+                 'title', 'price', 'original_price', 'sponsored', 'reviews_count', 'rating', 'sales_history', 'prime']
+
+# Compact dtypes for the parsed columns: few distinct terms/dates/hours, small integers,
+# nullable types so missing values do not turn integer columns into floats
+RESULT_DTYPES = {
+    'search_term': 'category',
+    'scrape_date': 'category',
+    'scrape_hour': 'category',
+    'page_number': 'Int16',
+    'position': 'Int16',
+    'sponsored': 'boolean',
+    'prime': 'boolean',
+    'rating': 'Float64',
+    'reviews_count': 'Int32'
+}
+
+# Raw marker of a result item, pages without it (captcha, errors, empty results) are not parsed
+_SEARCH_RESULT_BYTES = b"s-search-result"
+
+# Patterns compiled once at import time
+_SAFE_TERM_RE = re.compile(r'[^a-zA-Z0-9]')
+_FILENAME_TERM_RE = re.compile(r'([^_]+)')
+_PAGE_RE = re.compile(r'page(\d+)')
+_DATE_RE = re.compile(r'(\d{4}-\d{2}-\d{2})')
+_TIME_RE = re.compile(r'(\d{2}-\d{2})')
+_SECONDS_RE = re.compile(r'_(\d{2}-\d{2}-\d{2})\.html')
+# ASCII digits only, so the per-price and the column-wise (pyarrow) cleaning agree
+_PRICE_STRIP_RE = re.compile(r'[^0-9.,]')
+_PRICE_NUM_RE = re.compile(r'[0-9]+\.[0-9]+|[0-9]+')
+_PRICE_CHARS = frozenset('0123456789.,')
+_SPONSORED_RE = re.compile(r'sponsored', re.I)
+_PRIME_RE = re.compile(r'prime shipping|prime delivery', re.I)
+_REVIEWS_COUNT_RE = re.compile(r'([\d,.]+)(?:\s+ratings|\s+reviews)?', re.I)
+_REVIEWS_RE = re.compile(r'([\d,.]+)(?:\s+ratings|\s+reviews)', re.I)
+_RATING_RE = re.compile(r'(\d+(?:\.\d+)?)\s+out of\s+\d', re.I)
+_RATING_LABEL_RE = re.compile(r'(\d+(?:\.\d+)?)\s+out of\s+\d+\s+stars', re.I)
+_STAR_CLASS_RE = re.compile(r'a-star-([1-5])(?:-\d+)?')
+_ASIN_COMPONENT_RE = re.compile(r'(?:asin|product)/([A-Z0-9]{10})')
+_ASIN_HREF_RE = re.compile(r'/(?:dp|gp/product)/([A-Z0-9]{10})(?:/|\?|$)')
+
+
+def _subdirs(path, name=None):
+    # (name, path) of the directories below path, only the one called name when it is given
+    if name:
+        sub_path = os.path.join(path, name)
+        return [(name, sub_path)] if os.path.isdir(sub_path) else []
+    with os.scandir(path) as entries:
+        return [(entry.name, entry.path) for entry in entries if entry.is_dir()]
+
+
+def _parts_datetime(path_parts):
+    # (date, hour-minute) from the first path parts that look like YYYY-MM-DD and HH-MM
+    for part in path_parts:
+        date_match = _DATE_RE.match(part)
+        if date_match:
+            date_str = date_match.group(1)
+            break
+    else:
+        date_str = None
+    
+    for part in path_parts:
+        time_match = _TIME_RE.match(part)
+        if time_match and not _DATE_RE.match(part):  # Make sure it's not the date
+            hour_minute = time_match.group(1)
+            break
+    else:
+        hour_minute = None
+    
+    return date_str, hour_minute
+
+
+@functools.lru_cache(maxsize=4096)
+def _dir_datetime(dirname):
+    # all files of a run directory share its date and hour-minute, only the seconds differ
+    return _parts_datetime(dirname.split(os.sep))
+
+
+# parser of a worker process, built once by _init_worker
+_worker_parser = None
+
+
+def _init_worker(log_queue, html_dir):
+    global _worker_parser
+    # worker records go through the queue, the parent process writes them to the log handlers
+    logging.getLogger().handlers[:] = [logging.handlers.QueueHandler(log_queue)]
+    # reused for every file the worker is given
+    _worker_parser = AmazonSearchHTMLParser(html_dir, workers=1)
+
+
+def _parse_file_worker(html_file, raw_prices):
+    # top-level so it can be pickled into worker processes
+    return _worker_parser.parse_search_html_file(html_file, raw_prices)
+
 
 class AmazonSearchHTMLParser:
-    def __init__(self, html_dir):
+    # CSS selectors compiled once, run scoped to the strike-through price spans found by _index_item
+    _OFFSCREEN_SEL = sv.compile("span.a-offscreen")
+    _ARIA_HIDDEN_SEL = sv.compile("span[aria-hidden='true']")
+
+    def __init__(self, html_dir, workers=None):
         """
         Initialize the parser with the directory containing HTML files
         
         Args:
             html_dir (str): Path to the directory containing scraped HTML files
+            workers (int): Number of worker processes used to parse files, defaults to the CPU count
         """
         self.html_dir = html_dir
         if not os.path.exists(html_dir):
             raise ValueError(f"Directory not found: {html_dir}")
+        self.workers = workers or os.cpu_count() or 1
 
     def _extract_page_number(self, filename):
         """Extract page number from filename"""
-        page_match = re.search(r'page(\d+)', filename)
+        page_match = _PAGE_RE.search(filename)
         if page_match:
             return int(page_match.group(1))
         return 1  # Default to page 1 if not found
@@ -43,29 +157,18 @@ class AmazonSearchHTMLParser:
         """Extract date and time information from the file path"""
         try:
             # Extract from path structure: search_term/YYYY-MM-DD/HH-MM/search_term_page1_HH-MM-SS.html
-            path_parts = html_file.split(os.sep)
-            
-            # Extract date from directory structure
-            for part in path_parts:
-                date_match = re.match(r'(\d{4}-\d{2}-\d{2})', part)
-                if date_match:
-                    date_str = date_match.group(1)
-                    break
-            else:
-                date_str = None
-                
-            # Extract hour-minute from directory structure
-            for part in path_parts:
-                time_match = re.match(r'(\d{2}-\d{2})', part)
-                if time_match and not re.match(r'\d{4}-\d{2}-\d{2}', part):  # Make sure it's not the date
-                    hour_minute = time_match.group(1)
-                    break
-            else:
-                hour_minute = None
+            dirname, filename = os.path.split(html_file)
+            
+            # Extract date and hour-minute from directory structure, parsed once per directory
+            date_str, hour_minute = _dir_datetime(dirname)
+            if date_str is None or hour_minute is None:
+                # the file name is the last part of the path to look at
+                file_date, file_hour_minute = _parts_datetime((filename,))
+                date_str = date_str or file_date
+                hour_minute = hour_minute or file_hour_minute
                 
             # Extract seconds from filename
-            filename = os.path.basename(html_file)
-            seconds_match = re.search(r'_(\d{2}-\d{2}-\d{2})\.html', filename)
+            seconds_match = _SECONDS_RE.search(filename)
             if seconds_match:
                 seconds = seconds_match.group(1)
             else:
@@ -85,61 +188,180 @@ class AmazonSearchHTMLParser:
         if not price_text:
             return None
             
-        # Remove currency symbols and whitespace
-        price_str = re.sub(r'[^\d.,]', '', price_text)
+        # Remove currency symbols and whitespace, plain string operations instead of regexes
+        # (same result as _PRICE_STRIP_RE and _PRICE_NUM_RE, which _clean_price_column uses)
+        price_str = ''.join(c for c in price_text if c in _PRICE_CHARS)
         # Replace comma with dot for decimal separator (European format)
-        price_str = price_str.replace(',', '.')
-        
-        try:
-            # Find the first valid number in the string
-            number_match = re.search(r'\d+\.\d+|\d+', price_str)
-            if number_match:
-                return float(number_match.group())
-            return None
-        except:
+        price_str = price_str.replace(',', '.').lstrip('.')
+        if not price_str:
             return None
+        
+        # The first valid number: digits, optionally followed by a dot and more digits
+        whole, _, rest = price_str.partition('.')
+        fraction = rest.partition('.')[0]
+        return float(f"{whole}.{fraction}" if fraction else whole)
 
-    def _extract_ori_price(self, item):
-        """Find orginal price of the product"""
+    def _clean_price_column(self, prices):
+        """Clean a whole column of price texts at once, same rules as _clean_price"""
+        prices = prices.astype('string').str.replace(_PRICE_STRIP_RE.pattern, '', regex=True).str.replace(',', '.', regex=False)
+        return prices.str.extract(f'({_PRICE_NUM_RE.pattern})', expand=False).astype('Float64')
+
+    def _records_to_dataframe(self, records):
+        """Build a DataFrame from product dictionaries parsed with raw_prices"""
+        df = pd.DataFrame(records)
+        # One vectorized pass instead of a regex call per price
+        for column in ('price', 'original_price'):
+            df[column] = self._clean_price_column(df[column])
+        return df.astype(RESULT_DTYPES)
+
+    def _index_item(self, item):
+        """
+        Walk the result item once and collect the nodes every extractor needs,
+        instead of a separate select() per selector. Lists keep document order like select().
+        """
+        nodes = {key: [] for key in ('asin_links', 'titles', 'title_links', 'h2', 'offscreen_prices',
+                                     'whole_prices', 'color_prices', 'prices', 'strike_prices',
+                                     'review_counts', 'review_links', 'rating_icons', 'rating_labels',
+                                     'base_spans')}
+        nodes['sponsored_label'] = False
+        nodes['prime_icon'] = False
+        # every string of the item (comments and scripts included, like find(string=...)),
+        # joined only if a text check is needed
+        nodes['strings'] = []
+        nodes['text'] = None
+        
+        for tag in item.descendants:
+            if isinstance(tag, NavigableString):
+                nodes['strings'].append(tag)
+                continue
+            name = tag.name
+            classes = tag.get('class') or ()
+            
+            if name == 'span':
+                # one walk up the ancestors answers every descendant combinator for this span
+                in_price = in_review_link = in_small_row = in_heading_link = in_aok_relative = False
+                below_link = False
+                for parent in tag.parents:
+                    parent_name = parent.name
+                    if parent_name == 'a':
+                        below_link = True
+                        if 'customerReviews' in parent.get('href', ''):
+                            in_review_link = True
+                    elif parent_name in ('h2', 'h5'):
+                        if below_link:
+                            in_heading_link = True
+                    elif parent_name == 'span':
+                        parent_classes = parent.get('class') or ()
+                        in_price = in_price or 'a-price' in parent_classes
+                        in_aok_relative = in_aok_relative or 'aok-relative' in parent_classes
+                    elif parent_name == 'div':
+                        parent_classes = parent.get('class') or ()
+                        if 'a-row' in parent_classes and 'a-size-small' in parent_classes:
+                            in_small_row = True
+                
+                # price: span.a-price span.a-offscreen, span.a-price-whole, span.a-color-price, span.a-price
+                if in_price and 'a-offscreen' in classes:
+                    nodes['offscreen_prices'].append(tag)
+                if 'a-price-whole' in classes:
+                    nodes['whole_prices'].append(tag)
+                if 'a-color-price' in classes:
+                    nodes['color_prices'].append(tag)
+                if 'a-price' in classes:
+                    nodes['prices'].append(tag)
+                    if 'a-text-price' in classes and tag.get('data-a-strike') == 'true':
+                        nodes['strike_prices'].append(tag)
+                
+                # title: h2 a span, h5 a span, span.a-size-medium.a-color-base.a-text-normal
+                if in_heading_link or ('a-size-medium' in classes and 'a-color-base' in classes
+                                       and 'a-text-normal' in classes):
+                    nodes['titles'].append(tag)
+                
+                is_base_size = 'a-size-base' in classes
+                if is_base_size:
+                    nodes['base_spans'].append(tag)
+                # span.a-size-base.s-underline-text, span.a-size-base.a-color-secondary, a[href*='customerReviews'] span
+                if in_review_link or (is_base_size and ('s-underline-text' in classes or 'a-color-secondary' in classes)):
+                    nodes['review_counts'].append(tag)
+                # span.a-size-base.puis-normal-weight-text, div.a-row.a-size-small span.a-size-base
+                if is_base_size and ('puis-normal-weight-text' in classes or in_small_row):
+                    nodes['review_links'].append(tag)
+                
+                if 'a-icon-alt' in classes:
+                    nodes['rating_icons'].append(tag)
+                
+                if ('puis-label-popover-default' in classes or 's-label-popover-default' in classes
+                        or ('aok-inline-block' in classes and 's-sponsored-label-info-icon' in classes)):
+                    nodes['sponsored_label'] = True
+                
+                # span.aok-relative span.a-icon-prime, span.a-icon.a-icon-prime
+                if 'a-icon-prime' in classes and (in_aok_relative or 'a-icon' in classes):
+                    nodes['prime_icon'] = True
+            
+            elif name == 'a':
+                href = tag.get('href', '')
+                if '/dp/' in href or '/gp/product/' in href:
+                    nodes['asin_links'].append(tag)
+                if 'customerReviews' in href:
+                    nodes['review_links'].append(tag)
+                if tag.has_attr('title'):
+                    nodes['title_links'].append(tag)
+            
+            elif name == 'i':
+                if 'a-icon-star' in classes or 'a-icon-star-small' in classes:
+                    nodes['rating_icons'].append(tag)
+                if 'a-icon-prime' in classes:
+                    nodes['prime_icon'] = True
+            
+            elif name == 'h2':
+                nodes['h2'].append(tag)
+            
+            if 'stars' in tag.get('aria-label', ''):
+                nodes['rating_labels'].append(tag)
+        
+        return nodes
+
+    def _item_text(self, nodes):
+        """All strings of the item as one text, searched once instead of a regex per string node"""
+        if nodes['text'] is None:
+            # newline separated, the text patterns never match across two strings
+            nodes['text'] = '\n'.join(nodes['strings'])
+        return nodes['text']
+
+    def _extract_ori_price(self, nodes):
+        """Find orginal price text of the product"""
         # Look for the original price with strike through
         original_price = None
-        original_price_elements = item.select("span.a-price.a-text-price[data-a-strike='true']")
-        for elem in original_price_elements:
+        for elem in nodes['strike_prices']:
             # Try to get the price from the a-offscreen or aria-hidden elements inside
             price_text = None
-            offscreen = elem.select_one("span.a-offscreen")
+            offscreen = self._OFFSCREEN_SEL.select_one(elem)
             if offscreen:
                 price_text = offscreen.text.strip()
             else:
-                aria_hidden = elem.select_one("span[aria-hidden='true']")
+                aria_hidden = self._ARIA_HIDDEN_SEL.select_one(elem)
                 if aria_hidden:
                     price_text = aria_hidden.text.strip()
                 
             if price_text:
-                original_price = self._clean_price(price_text)
+                original_price = price_text
                 break
         return original_price
                       
-    def _extract_sponsored(self, item):
+    def _extract_sponsored(self, item, nodes):
         """Check if the item is sponsored"""
         try:
+            # Cheapest checks first, the text search scans all text of the item
+            # Check for data attribute
+            if "sp-sponsored" in item.attrs.get("data-component-type", ""):
+                return True
+            
             # Look for various sponsored indicators
-            sponsored_indicators = [
-                "span.puis-label-popover-default",
-                "span.s-label-popover-default",
-                "span.aok-inline-block.s-sponsored-label-info-icon",
-            ]
-            
-            for indicator in sponsored_indicators:
-                if item.select(indicator):
-                    return True
+            # (span.puis-label-popover-default, span.s-label-popover-default, span.s-sponsored-label-info-icon)
+            if nodes['sponsored_label']:
+                return True
                     
             # Check for "Sponsored" text
-            if item.find(string=re.compile(r'sponsored', re.I)):
-                return True
-                
-            # Check for data attribute
-            if "data-component-type" in item.attrs and "sp-sponsored" in item.attrs["data-component-type"]:
+            if _SPONSORED_RE.search(self._item_text(nodes)):
                 return True
                 
             return False
@@ -147,18 +369,17 @@ class AmazonSearchHTMLParser:
             logger.warning(f"Error checking sponsored status: {e}")
             return False
 
-    def _extract_reviews_and_rating(self, item):
+    def _extract_reviews_and_rating(self, nodes):
         """Extract review count and rating"""
         try:
             reviews_count = None
             rating = None
             
             # Check for specific review count elements
-            review_count_elements = item.select("span.a-size-base.s-underline-text, span.a-size-base.a-color-secondary, a[href*='customerReviews'] span")
-            for element in review_count_elements:
+            for element in nodes['review_counts']:
                 text = element.text.strip()
                 # Look for numbers followed by "ratings" or "reviews"
-                reviews_match = re.search(r'([\d,.]+)(?:\s+ratings|\s+reviews)?', text, re.I)
+                reviews_match = _REVIEWS_COUNT_RE.search(text)
                 if reviews_match:
                     try:
                         count_text = reviews_match.group(1).replace(',', '').replace('.', '')
@@ -170,13 +391,11 @@ class AmazonSearchHTMLParser:
             # If no review count found, try more generic selectors
             if not reviews_count:
                 # Find review link/container
-                review_elements = item.select("a[href*='customerReviews'], span.a-size-base.puis-normal-weight-text, div.a-row.a-size-small span.a-size-base")
-                
-                for element in review_elements:
+                for element in nodes['review_links']:
                     text = element.text.strip()
                     
                     # Extract review count
-                    reviews_match = re.search(r'([\d,.]+)(?:\s+ratings|\s+reviews)', text, re.I)
+                    reviews_match = _REVIEWS_RE.search(text)
                     if reviews_match:
                         try:
                             reviews_count = int(reviews_match.group(1).replace(',', '').replace('.', ''))
@@ -185,12 +404,11 @@ class AmazonSearchHTMLParser:
                             continue
             
             # Extract rating
-            rating_elements = item.select("i.a-icon-star, i.a-icon-star-small, span.a-icon-alt")
-            for element in rating_elements:
+            for element in nodes['rating_icons']:
                 text = element.text.strip()
                 if text:
                     # Direct text like "4.5 out of 5 stars"
-                    rating_match = re.search(r'(\d+(?:\.\d+)?)\s+out of\s+\d', text, re.I)
+                    rating_match = _RATING_RE.search(text)
                     if rating_match:
                         rating = float(rating_match.group(1))
                         break
@@ -198,7 +416,7 @@ class AmazonSearchHTMLParser:
                     # Try to get from class name
                     class_list = element.get("class", [])
                     for class_name in class_list:
-                        rating_match = re.search(r'a-star-([1-5])(?:-\d+)?', class_name)
+                        rating_match = _STAR_CLASS_RE.search(class_name)
                         if rating_match:
                             # Check if it's "a-star-4-5" format (4.5 stars)
                             if '-' in rating_match.group(1):
@@ -215,10 +433,9 @@ class AmazonSearchHTMLParser:
             
             # If rating not found yet, try the aria-label attribute
             if not rating:
-                star_elements = item.select("[aria-label*='stars']")
-                for element in star_elements:
+                for element in nodes['rating_labels']:
                     aria_label = element.get("aria-label", "")
-                    rating_match = re.search(r'(\d+(?:\.\d+)?)\s+out of\s+\d+\s+stars', aria_label, re.I)
+                    rating_match = _RATING_LABEL_RE.search(aria_label)
                     if rating_match:
                         rating = float(rating_match.group(1))
                         break
@@ -228,34 +445,25 @@ class AmazonSearchHTMLParser:
             logger.warning(f"Error extracting reviews and rating: {e}")
             return None, None
         
-    def _extract_sales_history(self, element):
+    def _extract_sales_history(self, nodes):
         """Extract sales history text if available"""
-        sales_elements = element.select('span.a-size-base')
-        
-        for span in sales_elements:
+        for span in nodes['base_spans']:
             text = span.text.strip()
             if any(keyword in text.lower() for keyword in ['bought', 'orders', 'purchased']):
                 return text
         
         return None
 
-    def _extract_prime(self, item):
+    def _extract_prime(self, nodes):
         """Check if the item has Prime shipping"""
         try:
             # Look for prime logo/badge
-            prime_indicators = [
-                "i.a-icon-prime",
-                "span.aok-relative span.a-icon-prime",
-                "span.a-icon.a-icon-prime"
-            ]
-            
-            for indicator in prime_indicators:
-                if item.select(indicator):
-                    return True
+            # (i.a-icon-prime, span.aok-relative span.a-icon-prime, span.a-icon.a-icon-prime)
+            if nodes['prime_icon']:
+                return True
             
             # Check text mentions
-            prime_texts = item.find_all(string=re.compile(r'prime shipping|prime delivery', re.I))
-            if prime_texts:
+            if _PRIME_RE.search(self._item_text(nodes)):
                 return True
                 
             return False
@@ -263,7 +471,7 @@ class AmazonSearchHTMLParser:
             logger.warning(f"Error checking prime status: {e}")
             return False
 
-    def _extract_asin(self, item):
+    def _extract_asin(self, item, nodes):
         """Extract the ASIN from the item"""
         try:
             # Try direct data attribute first
@@ -275,14 +483,14 @@ class AmazonSearchHTMLParser:
             # Try from data-component-id
             if "data-component-id" in item.attrs:
                 comp_id = item.attrs["data-component-id"]
-                asin_match = re.search(r'(?:asin|product)/([A-Z0-9]{10})', comp_id)
+                asin_match = _ASIN_COMPONENT_RE.search(comp_id)
                 if asin_match:
                     return asin_match.group(1)
             
             # Try from links
-            for link in item.select("a[href*='/dp/'], a[href*='/gp/product/']"):
+            for link in nodes['asin_links']:
                 href = link.get("href", "")
-                asin_match = re.search(r'/(?:dp|gp/product)/([A-Z0-9]{10})(?:/|\?|$)', href)
+                asin_match = _ASIN_HREF_RE.search(href)
                 if asin_match:
                     return asin_match.group(1)
             
@@ -291,22 +499,22 @@ class AmazonSearchHTMLParser:
             logger.warning(f"Error extracting ASIN: {e}")
             return None
 
-    def _extract_title(self, item):
+    def _extract_title(self, nodes):
         """Extract product title"""
         try:
             # Try specific title elements first
-            title_elements = item.select("h2 a span, h5 a span, span.a-size-medium.a-color-base.a-text-normal")
+            title_elements = nodes['titles']
             
             if title_elements:
                 return title_elements[0].text.strip()
             
             # Try links with title attribute
-            links = item.select("a[title]")
+            links = nodes['title_links']
             if links:
                 return links[0].get("title", "").strip()
                 
             # Try any text in the h2
-            h2 = item.select("h2")
+            h2 = nodes['h2']
             if h2:
                 return h2[0].text.strip()
                 
@@ -315,34 +523,29 @@ class AmazonSearchHTMLParser:
             logger.warning(f"Error extracting title: {e}")
             return None
 
-    def _extract_price(self, item):
-        """Extract product price"""
+    def _extract_price(self, nodes):
+        """Extract product price text"""
         try:
-            # Try all common price selectors
-            price_selectors = [
-                "span.a-price span.a-offscreen",
-                "span.a-price-whole",
-                "span.a-color-price",
-                "span.a-price"
-            ]
-            
-            for selector in price_selectors:
-                elements = item.select(selector)
+            # Try all common price selectors, in order:
+            # span.a-price span.a-offscreen, span.a-price-whole, span.a-color-price, span.a-price
+            for key in ('offscreen_prices', 'whole_prices', 'color_prices', 'prices'):
+                elements = nodes[key]
                 if elements:
-                    price_text = elements[0].text.strip()
-                    return self._clean_price(price_text)
+                    return elements[0].text.strip()
             
             return None
         except Exception as e:
             logger.warning(f"Error extracting price: {e}")
             return None
 
-    def parse_search_html_file(self, html_file):
+    def parse_search_html_file(self, html_file, raw_prices=False):
         """
         Parse a single search results HTML file
         
         Args:
             html_file (str): Path to the HTML file
+            raw_prices (bool): Keep the price texts as found, for callers that clean
+                them column-wise with _records_to_dataframe
             
         Returns:
             list: List of dictionaries containing product details
@@ -370,7 +573,7 @@ class AmazonSearchHTMLParser:
                 search_term = safe_term.replace('_', ' ').strip()
             else:
                 # Fallback to getting search term from filename
-                search_term_match = re.match(r'([^_]+)', filename)
+                search_term_match = _FILENAME_TERM_RE.match(filename)
                 if search_term_match:
                     search_term = search_term_match.group(1).replace('_', ' ').strip()
                 else:
@@ -379,15 +582,25 @@ class AmazonSearchHTMLParser:
             page_number = self._extract_page_number(filename)
             datetime_info = self._extract_datetime_from_path(html_file)
             
-            # Read the HTML file
-            with open(html_file, 'r', encoding='utf-8') as f:
-                html_content = f.read()
+            # Read the HTML file as bytes, lxml decodes it while parsing
+            with open(html_file, 'rb') as f:
+                html_content = None
+                if os.fstat(f.fileno()).st_size:
+                    # mapped, the marker is searched in the page cache and the file is only copied when it has results
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        if mm.find(_SEARCH_RESULT_BYTES) != -1:
+                            html_content = mm[:]
             
-            # Parse with BeautifulSoup
-            soup = BeautifulSoup(html_content, 'html.parser')
+            if html_content is None:
+                logger.warning(f"No search results found in {html_file}")
+                return []
+            
+            # Parse with BeautifulSoup (C-backed lxml parser), skipping head, navigation and footer
+            # (the scraper saves pages as UTF-8, no need to sniff the encoding)
+            soup = BeautifulSoup(html_content, 'lxml', parse_only=SEARCH_RESULT_STRAINER, from_encoding='utf-8')
             
             # Find all search result items
-            result_items = soup.select("div[data-component-type='s-search-result']")
+            result_items = soup.find_all('div', attrs=SEARCH_RESULT_ATTRS)
             
             if not result_items:
                 logger.warning(f"No search results found in {html_file}")
@@ -396,18 +609,23 @@ class AmazonSearchHTMLParser:
             # Process each search result
             results = []
             for position, item in enumerate(result_items, 1):
-                asin = self._extract_asin(item)
+                # One walk over the item instead of a select() per selector
+                nodes = self._index_item(item)
+                asin = self._extract_asin(item, nodes)
                 
                 if not asin:
                     continue  # Skip items without ASIN
                 
-                title = self._extract_title(item)
-                price = self._extract_price(item)
-                original_price = self._extract_ori_price(item)
-                is_sponsored = self._extract_sponsored(item)
-                reviews_count, rating = self._extract_reviews_and_rating(item)
-                sales_history = self._extract_sales_history(item)
-                is_prime = self._extract_prime(item)
+                title = self._extract_title(nodes)
+                price = self._extract_price(nodes)
+                original_price = self._extract_ori_price(nodes)
+                if not raw_prices:
+                    price = self._clean_price(price)
+                    original_price = self._clean_price(original_price)
+                is_sponsored = self._extract_sponsored(item, nodes)
+                reviews_count, rating = self._extract_reviews_and_rating(nodes)
+                sales_history = self._extract_sales_history(nodes)
+                is_prime = self._extract_prime(nodes)
                 
                 # Create result object with all required fields
                 result = {
@@ -437,62 +655,145 @@ class AmazonSearchHTMLParser:
             logger.error(f"Error parsing file {html_file}: {e}")
             return []
 
-    def parse_search_term_for_run(self, search_term, run_datetime=None):
+    def _walk_runs(self, safe_term=None, run_datetime=None):
         """
-        Parse HTML files for a specific search term for a specific scheduled run
+        Walk search_term/YYYY-MM-DD/HH-MM directories with os.scandir, which caches the file type
+        of each entry instead of a stat call per isdir check
         
         Args:
-            search_term (str): The search term to process
-            run_datetime (tuple): Optional (date, hour-minute) to specify a particular run
+            safe_term (str): Optional search term directory to limit the walk to
+            run_datetime (tuple): Optional (date, hour-minute) to limit the walk to a particular run
             
-        Returns:
-            pandas.DataFrame: DataFrame containing product details for this run
+        Yields:
+            tuple: (safe_term, date_dir, time_dir, html_files) for every run directory
         """
-        all_results = []
+        date_str, time_str = run_datetime if run_datetime else (None, None)
         
-        # Create safe search term for directory lookup
-        safe_term = re.sub(r'[^a-zA-Z0-9]', '_', search_term)
-        term_dir = os.path.join(self.html_dir, safe_term)
-        
-        if not os.path.exists(term_dir):
-            logger.error(f"Search term directory not found: {term_dir}")
-            return pd.DataFrame()
+        for term_dir, term_path in _subdirs(self.html_dir, safe_term):
+            for date_dir, date_path in _subdirs(term_path, date_str):
+                for time_dir, time_path in _subdirs(date_path, time_str):
+                    with os.scandir(time_path) as entries:
+                        html_files = [entry.path for entry in entries
+                                      if entry.name.endswith('.html') and entry.is_file()]
+                    yield term_dir, date_dir, time_dir, html_files
+
+    def _parse_files(self, html_files, raw_prices=False):
+        """
+        Parse several HTML files, in worker processes when there is more than one
         
-        # Find all date directories or use specific date if provided
-        if run_datetime and run_datetime[0]:
-            date_dirs = [run_datetime[0]] if os.path.exists(os.path.join(term_dir, run_datetime[0])) else []
+        Args:
+            html_files (list): Paths to the HTML files
+            raw_prices (bool): Keep the price texts as found (see parse_search_html_file)
+            
+        Yields:
+            list: One list of product dictionaries per file, in the order of html_files
+        """
+        if self.workers > 1 and len(html_files) > 1:
+            log_queue = multiprocessing.Queue()
+            listener = logging.handlers.QueueListener(log_queue, *logging.getLogger().handlers,
+                                                      respect_handler_level=True)
+            listener.start()
+            try:
+                with ProcessPoolExecutor(max_workers=min(self.workers, len(html_files)),
+                                         initializer=_init_worker, initargs=(log_queue, self.html_dir)) as ex:
+                    yield from ex.map(_parse_file_worker, html_files, [raw_prices] * len(html_files),
+                                      chunksize=8)
+            finally:
+                listener.stop()
         else:
-            date_dirs = [d for d in os.listdir(term_dir) if os.path.isdir(os.path.join(term_dir, d))]
+            for html_file in html_files:
+                yield self.parse_search_html_file(html_file, raw_prices)
+
+    def iter_search_results(self, search_term=None, run_datetime=None, raw_prices=False):
+        """
+        Parse HTML files of a search term and/or run, one product at a time
         
-        for date_dir in date_dirs:
-            date_path = os.path.join(term_dir, date_dir)
+        Args:
+            search_term (str): The search term to process, all search terms when None
+            run_datetime (tuple): Optional (date, hour-minute) to specify a particular run
+            raw_prices (bool): Keep the price texts as found (see parse_search_html_file)
             
-            # Find all time directories or use specific time if provided
-            if run_datetime and run_datetime[1]:
-                time_dirs = [run_datetime[1]] if os.path.exists(os.path.join(date_path, run_datetime[1])) else []
-            else:
-                time_dirs = [d for d in os.listdir(date_path) if os.path.isdir(os.path.join(date_path, d))]
+        Yields:
+            dict: Product details, only the results of files not yet written out are kept in memory
+        """
+        safe_term = None
+        if search_term:
+            # Create safe search term for directory lookup
+            safe_term = _SAFE_TERM_RE.sub('_', search_term)
+            term_dir = os.path.join(self.html_dir, safe_term)
             
-            for time_dir in time_dirs:
-                time_path = os.path.join(date_path, time_dir)
-                
-                # Find all HTML files
-                html_files = glob.glob(os.path.join(time_path, "*.html"))
-                
-                for html_file in html_files:
-                    results = self.parse_search_html_file(html_file)
-                    all_results.extend(results)
+            if not os.path.exists(term_dir):
+                logger.error(f"Search term directory not found: {term_dir}")
+                return
+        
+        # Find all HTML files of every run, or of the specific run if provided
+        html_files = [html_file for _, _, _, run_files in self._walk_runs(safe_term, run_datetime)
+                      for html_file in run_files]
+        
+        # Files of every term and run go through one pool
+        for results in self._parse_files(html_files, raw_prices):
+            yield from results
+
+    def parse_search_term_for_run(self, search_term=None, run_datetime=None):
+        """
+        Parse HTML files for a specific search term for a specific scheduled run
+        
+        Args:
+            search_term (str): The search term to process, all search terms when None
+            run_datetime (tuple): Optional (date, hour-minute) to specify a particular run
+            
+        Returns:
+            pandas.DataFrame: DataFrame containing product details for this run
+        """
+        # The records become a single DataFrame
+        all_results = list(self.iter_search_results(search_term, run_datetime, raw_prices=True))
         
         if not all_results:
-            logger.warning(f"No results found for search term: {search_term}")
+            logger.warning(f"No results found for search term: {search_term or 'all search terms'}")
             return pd.DataFrame()
         
         # Convert to DataFrame
-        df = pd.DataFrame(all_results)
-        logger.info(f"Created DataFrame with {len(df)} products for search term: {search_term}")
+        df = self._records_to_dataframe(all_results)
+        logger.info(f"Created DataFrame with {len(df)} products for search term: {search_term or 'all search terms'}")
         
         return df
 
+    def iter_runs(self, raw_prices=False):
+        """
+        Parse all search terms, grouped by scheduled run
+        
+        Args:
+            raw_prices (bool): Keep the price texts as found (see parse_search_html_file)
+            
+        Yields:
+            tuple: (run_id, list of product dictionaries) for every run with results
+        """
+        # Identify all unique runs (date + hour-minute combinations) and their files in one walk
+        files_by_run = {}
+        for _, date_dir, time_dir, html_files in self._walk_runs():
+            files_by_run.setdefault((date_dir, time_dir), []).extend(html_files)
+        
+        logger.info(f"Found {len(files_by_run)} scheduled runs across all search terms")
+        
+        # Files of all runs go through one pool, results come back in the same order
+        runs = sorted(files_by_run)
+        all_files = [html_file for run in runs for html_file in files_by_run[run]]
+        with contextlib.closing(self._parse_files(all_files, raw_prices)) as results_lists:
+            # Process each run separately
+            for date_dir, time_dir in runs:
+                run_id = f"{date_dir}_{time_dir}"
+                logger.info(f"Processing run: {run_id}")
+                
+                run_files = files_by_run[(date_dir, time_dir)]
+                all_results = [result for results in itertools.islice(results_lists, len(run_files))
+                               for result in results]
+                
+                if all_results:
+                    logger.info(f"Run {run_id}: Collected {len(all_results)} products across all search terms")
+                    yield run_id, all_results
+                else:
+                    logger.warning(f"Run {run_id}: No results found for any search term")
+
     def process_all_runs(self):
         """
         Process all search terms and create separate files for each scheduled run
@@ -500,44 +801,37 @@ class AmazonSearchHTMLParser:
         Returns:
             dict: Dictionary mapping run timestamps to DataFrames
         """
-        # First, identify all unique runs (date + hour-minute combinations)
-        runs = set()
-        search_terms = [d for d in os.listdir(self.html_dir) if os.path.isdir(os.path.join(self.html_dir, d))]
-        
-        for safe_term in search_terms:
-            term_dir = os.path.join(self.html_dir, safe_term)
-            date_dirs = [d for d in os.listdir(term_dir) if os.path.isdir(os.path.join(term_dir, d))]
-            
-            for date_dir in date_dirs:
-                date_path = os.path.join(term_dir, date_dir)
-                time_dirs = [d for d in os.listdir(date_path) if os.path.isdir(os.path.join(date_path, d))]
-                
-                for time_dir in time_dirs:
-                    runs.add((date_dir, time_dir))
-        
-        logger.info(f"Found {len(runs)} scheduled runs across all search terms")
-        
-        # Process each run separately
-        run_results = {}
-        for date_dir, time_dir in sorted(runs):
-            run_id = f"{date_dir}_{time_dir}"
-            logger.info(f"Processing run: {run_id}")
-            
-            all_results = []
-            for safe_term in search_terms:
-                search_term = safe_term.replace('_', ' ').strip()
-                df = self.parse_search_term_for_run(search_term, (date_dir, time_dir))
-                if not df.empty:
-                    all_results.append(df)
-            
-            if all_results:
-                combined_df = pd.concat(all_results, ignore_index=True)
-                run_results[run_id] = combined_df
-                logger.info(f"Run {run_id}: Collected {len(combined_df)} products across all search terms")
-            else:
-                logger.warning(f"Run {run_id}: No results found for any search term")
+        return {run_id: self._records_to_dataframe(records)
+                for run_id, records in self.iter_runs(raw_prices=True)}
+
+
+def _write_results_csv(records, output_file):
+    """
+    Write product dictionaries straight to CSV rows, same columns and layout as DataFrame.to_csv.
+    Review counts are written as integers (1234), the old float column wrote them as 1234.0.
+    
+    Args:
+        records (iterable): Product dictionaries
+        output_file (str): Path of the CSV file, only created (or replaced) once there is a record
         
-        return run_results
+    Returns:
+        int: Number of rows written
+    """
+    records = iter(records)
+    first = next(records, None)
+    if first is None:
+        # nothing parsed, results of an earlier run stay as they are
+        return 0
+    
+    count = 0
+    with open(output_file, 'w', newline='', encoding='utf-8-sig') as f:
+        # missing values empty, platform line endings
+        writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS, lineterminator=os.linesep)
+        writer.writeheader()
+        for record in itertools.chain([first], records):
+            writer.writerow(record)
+            count += 1
+    return count
 
 
 def main():
@@ -547,6 +841,8 @@ def main():
     parser.add_argument("--run-datetime", help="Specific run datetime in format YYYY-MM-DD_HH-MM (optional)")
     parser.add_argument("--output-dir", default="parsed_results_1", help="Directory to save output files")
     parser.add_argument("--single-file", action="store_true", help="Output all results to a single file instead of per-run files")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Number of processes parsing HTML files (default: CPU count)")
     
     args = parser.parse_args()
     
@@ -554,47 +850,37 @@ def main():
         # Create output directory
         os.makedirs(args.output_dir, exist_ok=True)
         
-        html_parser = AmazonSearchHTMLParser(args.html_dir)
+        html_parser = AmazonSearchHTMLParser(args.html_dir, workers=args.workers)
         
+        # Records are written as soon as they are parsed, no DataFrame is built for the output files
         if args.search_term and args.run_datetime:
             # Parse a specific search term for a specific run
             date_str, time_str = args.run_datetime.split('_')
             logger.info(f"Parsing results for search term '{args.search_term}' from run {args.run_datetime}")
-            results_df = html_parser.parse_search_term_for_run(args.search_term, (date_str, time_str))
             
-            if not results_df.empty:
-                output_file = os.path.join(args.output_dir, f"{args.search_term.replace(' ', '_')}_{args.run_datetime}.csv")
-                results_df.to_csv(output_file, index=False, encoding='utf-8-sig')
+            output_file = os.path.join(args.output_dir, f"{args.search_term.replace(' ', '_')}_{args.run_datetime}.csv")
+            if _write_results_csv(html_parser.iter_search_results(args.search_term, (date_str, time_str)), output_file):
                 logger.info(f"Results saved to {output_file}")
+            else:
+                logger.warning(f"No results found for search term: {args.search_term}")
                 
         elif args.search_term:
             # Parse all runs for a specific search term
             logger.info(f"Parsing all runs for search term: {args.search_term}")
-            results_df = html_parser.parse_search_term_for_run(args.search_term)
             
-            if not results_df.empty:
-                output_file = os.path.join(args.output_dir, f"{args.search_term.replace(' ', '_')}_all_runs.csv")
-                results_df.to_csv(output_file, index=False, encoding='utf-8-sig')
+            output_file = os.path.join(args.output_dir, f"{args.search_term.replace(' ', '_')}_all_runs.csv")
+            if _write_results_csv(html_parser.iter_search_results(args.search_term), output_file):
                 logger.info(f"Results saved to {output_file}")
+            else:
+                logger.warning(f"No results found for search term: {args.search_term}")
                 
         elif args.run_datetime:
             # Parse all search terms for a specific run
             date_str, time_str = args.run_datetime.split('_')
             logger.info(f"Parsing all search terms for run: {args.run_datetime}")
             
-            all_results = []
-            search_terms = [d for d in os.listdir(args.html_dir) if os.path.isdir(os.path.join(args.html_dir, d))]
-            
-            for safe_term in search_terms:
-                search_term = safe_term.replace('_', ' ').strip()
-                df = html_parser.parse_search_term_for_run(search_term, (date_str, time_str))
-                if not df.empty:
-                    all_results.append(df)
-            
-            if all_results:
-                combined_df = pd.concat(all_results, ignore_index=True)
-                output_file = os.path.join(args.output_dir, f"all_terms_{args.run_datetime}.csv")
-                combined_df.to_csv(output_file, index=False, encoding='utf-8-sig')
+            output_file = os.path.join(args.output_dir, f"all_terms_{args.run_datetime}.csv")
+            if _write_results_csv(html_parser.iter_search_results(run_datetime=(date_str, time_str)), output_file):
                 logger.info(f"Results saved to {output_file}")
             else:
                 logger.warning(f"No results found for run {args.run_datetime}")
@@ -603,18 +889,8 @@ def main():
             # Output everything to a single file
             logger.info("Parsing all search terms and runs into a single file")
             
-            all_results = []
-            for safe_term in os.listdir(args.html_dir):
-                if os.path.isdir(os.path.join(args.html_dir, safe_term)):
-                    search_term = safe_term.replace('_', ' ').strip()
-                    df = html_parser.parse_search_term_for_run(search_term)
-                    if not df.empty:
-                        all_results.append(df)
-            
-            if all_results:
-                combined_df = pd.concat(all_results, ignore_index=True)
-                output_file = os.path.join(args.output_dir, "all_search_results.csv")
-                combined_df.to_csv(output_file, index=False, encoding='utf-8-sig')
+            output_file = os.path.join(args.output_dir, "all_search_results.csv")
+            if _write_results_csv(html_parser.iter_search_results(), output_file):
                 logger.info(f"All results saved to {output_file}")
             else:
                 logger.warning("No results found in any search term directory")
@@ -622,19 +898,23 @@ def main():
         else:
             # Process each run separately
             logger.info("Processing all search terms organized by scheduled runs")
-            run_results = html_parser.process_all_runs()
             
-            if run_results:
-                for run_id, df in run_results.items():
-                    output_file = os.path.join(args.output_dir, f"run_{run_id}.csv")
-                    df.to_csv(output_file, index=False, encoding='utf-8-sig')
-                    logger.info(f"Results for run {run_id} saved to {output_file}")
-                    
-                    # Also save to JSON if needed
-                    json_output = os.path.join(args.output_dir, f"run_{run_id}.json")
-                    df.to_json(json_output, orient='records', lines=True)
-                    logger.info(f"Results for run {run_id} also saved to {json_output}")
-            else:
+            run_count = 0
+            for run_id, records in html_parser.iter_runs():
+                output_file = os.path.join(args.output_dir, f"run_{run_id}.csv")
+                _write_results_csv(records, output_file)
+                logger.info(f"Results for run {run_id} saved to {output_file}")
+                
+                # Also save to JSON if needed, one record per line (review counts as 1234, not 1234.0 as to_json wrote them)
+                json_output = os.path.join(args.output_dir, f"run_{run_id}.json")
+                with open(json_output, 'wb') as json_file:
+                    for record in records:
+                        json_file.write(orjson.dumps(record))
+                        json_file.write(b'\n')
+                logger.info(f"Results for run {run_id} also saved to {json_output}")
+                run_count += 1
+            
+            if not run_count:
                 logger.warning("No results found for any run")
     
     except Exception as e: